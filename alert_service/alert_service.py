@@ -1,17 +1,35 @@
 import asyncio
+import hashlib
 import logging
 import time
-from threading import Thread
-from typing import Optional
+from dataclasses import dataclass
+from functools import partial
+from threading import Lock, Thread
+from typing import Callable, Optional
 
 import config
-import pykeybasebot.types.chat1 as chat1
 import redis
 import requests
-from pykeybasebot import Bot
+from inhibition import INHIBITION_RULES, Inhibitor
+from routing import DEFAULT_ROUTE, Route, Router, parse_routes
+from status_api import StatusSnapshot, start_status_api
 
+from shared import clock
 from shared.alert_group_store import AlertGroup, AlertGroupStore
+from shared.heartbeat import HeartbeatReporter
+from shared.history_store import HistoryStore
 from shared.issue_store import Issue, IssueStore
+from shared.issue_templates import ISSUE_TEMPLATES, render_issue_summary
+from shared.startup import StartupTimer
+
+startup_timer = StartupTimer()
+
+# Issue types whose templates need no fields, so an empty `fields` is expected.
+FIELDLESS_ISSUE_TYPES = {
+    issue_type
+    for issue_type, template in ISSUE_TEMPLATES.items()
+    if template.subject is None and not template.details
+}
 
 # Configure logging
 logging.basicConfig(
@@ -23,39 +41,49 @@ redis_client = redis.Redis(
     host=config.REDIS_HOST, port=config.REDIS_PORT, decode_responses=True
 )
 issue_store = IssueStore(redis_client)
-alert_group_store = AlertGroupStore(redis_client)
+alert_group_store = AlertGroupStore(redis_client, config.GROUP_IDLE_TTL)
+heartbeat = HeartbeatReporter(redis_client, "alert_service")
+history_store = HistoryStore(redis_client, config.HISTORY_MAX_EVENTS)
+inhibitor = Inhibitor(INHIBITION_RULES)
+router = Router(
+    parse_routes(
+        config.ALERT_ROUTES,
+        Route(DEFAULT_ROUTE, config.KEYBASE_BOT_CHANNEL, config.TELEGRAM_BOT_CHANNEL),
+    )
+)
+status_snapshot = StatusSnapshot()
 
 
-def fetch_issues() -> list[Issue]:
-    """Fetch all issues from Redis."""
-    try:
-        return issue_store.fetch_issues()
-    except Exception as e:
-        logging.error(f"Failed to fetch issues from Redis: {e}")
-        return []
+# Groups with nothing scheduled are only looked at again when their version changes.
+NEVER = float("inf")
+# Alert group that holds the timing state of digest notifications.
+DIGEST_GROUP_ID = "digest"
 
 
-def group_issues_by_group_id(issues: list[Issue]) -> dict[str, list[Issue]]:
-    """Group issues by their alert group id."""
-    grouped_issues = {}
-    for issue in issues:
-        grouped_issues.setdefault(issue.group_id, []).append(issue)
-    return grouped_issues
+@dataclass
+class GroupState:
+    """What the alert service remembers about a group between passes."""
 
+    version: int
+    next_check: float = 0
+    body_version: Optional[int] = None
+    body: str = ""
+    source_types: frozenset[str] = frozenset()
 
-def delete_issue(issue_id: str) -> None:
-    """Deletes a specific issue from Redis."""
-    issue_store.delete_issue(issue_id)
+
+group_states: dict[str, GroupState] = {}
+# (group_type, issue_type) pairs hidden by active issues in other groups.
+inhibited: frozenset[tuple[str, str]] = frozenset()
 
 
-def update_health_status() -> None:
-    """Update last check timestamp in Redis."""
-    redis_client.set("health:alert_service", int(time.time()))
+def delete_issue(issue: Issue) -> None:
+    """Deletes a specific issue from Redis."""
+    issue_store.delete_issue(issue.id, issue.group_id)
 
 
 def how_long(ts: int) -> str:
     """Calculate and format a human-readable duration since the given timestamp."""
-    duration = int(time.time() - ts)
+    duration = int(clock.now() - ts)
     intervals = [(24 * 60 * 60, "day", "days"), (60 * 60, "hour", "hours")]
     for seconds, singular, plural in intervals:
         if duration >= seconds:
@@ -67,6 +95,17 @@ def how_long(ts: int) -> str:
 
 def issue_summary(issue: Issue) -> str:
     """Return a compact summary for grouped messages."""
+    if issue.fields or issue.issue_type in FIELDLESS_ISSUE_TYPES:
+        summary = render_issue_summary(issue.issue_type, issue.fields, issue.resolved)
+    else:
+        summary = legacy_issue_summary(issue)
+    if issue.flap_score >= config.FLAP_SCORE_BORDER:
+        summary += " (flapping)"
+    return summary
+
+
+def legacy_issue_summary(issue: Issue) -> str:
+    """Summarize an issue stored before issues carried structured fields."""
     lines = []
     for line in issue.message.splitlines():
         line = line.strip()
@@ -75,17 +114,22 @@ def issue_summary(issue: Issue) -> str:
         if issue.group_type == "node" and line.startswith("Node:"):
             continue
         lines.append(line)
-    summary = " ".join(lines)
-    return summary.replace("⚠️ ", "").replace("✅ ", "")
+    return " ".join(lines).replace("⚠️ ", "").replace("✅ ", "")
 
 
 def pluralize_issue(count: int) -> str:
     return "issue" if count == 1 else "issues"
 
 
-def visible_active_issues(issues: list[Issue]) -> list[Issue]:
-    """Return active issues after applying suppression rules."""
-    active_issues = [issue for issue in issues if not issue.resolved]
+def visible_active_issues(
+    issues: list[Issue], inhibited: frozenset[tuple[str, str]] = frozenset()
+) -> list[Issue]:
+    """Return active issues after applying suppression and inhibition rules."""
+    active_issues = [
+        issue
+        for issue in issues
+        if not issue.resolved and (issue.group_type, issue.issue_type) not in inhibited
+    ]
     if not active_issues:
         return []
 
@@ -99,32 +143,86 @@ def visible_active_issues(issues: list[Issue]) -> list[Issue]:
     return sorted(active_issues, key=lambda issue: issue.id)
 
 
+def issue_status(issue: Issue) -> dict:
+    return {
+        "id": issue.id,
+        "issue_type": issue.issue_type,
+        "severity": issue.severity,
+        "summary": issue_summary(issue),
+        "started_at": issue.started_at,
+        "updated_at": issue.updated_at,
+        "flap_score": issue.flap_score,
+    }
+
+
+def group_status(issues: list[Issue]) -> Optional[dict]:
+    """Describe a group for the status API, or None if it has no issues."""
+    if not issues:
+        return None
+
+    visible_issues = visible_active_issues(issues, inhibited)
+    visible_ids = {issue.id for issue in visible_issues}
+    return {
+        "group_type": issues[0].group_type,
+        "group_name": issues[0].group_name,
+        "visible": [issue_status(issue) for issue in visible_issues],
+        "suppressed": [
+            issue_status(issue)
+            for issue in issues
+            if not issue.resolved and issue.id not in visible_ids
+        ],
+        "resolved": [issue_status(issue) for issue in issues if issue.resolved],
+    }
+
+
 def group_fingerprint(issues: list[Issue]) -> str:
     """Build a stable fingerprint for the visible active issue set."""
     return "|".join(f"{issue.issue_type}:{issue.id}" for issue in issues)
 
 
-def should_send_active_group(
-    group: AlertGroup, fingerprint: str, current_timestamp: int
-) -> bool:
-    """Decide whether an active group notification is due."""
+def next_active_group_send(group: AlertGroup, fingerprint: str) -> int:
+    """Return when the next active group notification becomes due."""
     if group.last_alert == 0:
-        return current_timestamp - group.first_seen >= config.GROUP_WAIT
+        return group.first_seen + config.GROUP_WAIT
 
     if fingerprint != group.last_fingerprint:
-        return current_timestamp - group.last_alert >= config.GROUP_INTERVAL
+        return group.last_alert + config.GROUP_INTERVAL
+
+    return group.last_alert + config.REPEAT_INTERVAL
 
-    return current_timestamp - group.last_alert >= config.REPEAT_INTERVAL
+
+def is_node_down(active_issues: list[Issue]) -> bool:
+    first_issue = active_issues[0]
+    return first_issue.group_type == "node" and first_issue.issue_type == "node_state"
 
 
 def build_active_group_message(
+    active_issues: list[Issue],
+    resolved_issues: Optional[list[Issue]] = None,
+    body: Optional[str] = None,
+) -> str:
+    """Build a grouped message for active visible issues.
+
+    A body rendered earlier for the same group version can be passed in; only
+    the duration line is recomputed then.
+    """
+    if body is None:
+        body = build_active_group_body(active_issues, resolved_issues)
+    if is_node_down(active_issues):
+        return body
+
+    oldest_started_at = min(issue.started_at for issue in active_issues)
+    return f"{body}\n\n{how_long(oldest_started_at)}"
+
+
+def build_active_group_body(
     active_issues: list[Issue], resolved_issues: Optional[list[Issue]] = None
 ) -> str:
-    """Build a grouped message for active visible issues."""
+    """Build the time-independent part of an active group message."""
     first_issue = active_issues[0]
     count = len(active_issues)
 
-    if first_issue.group_type == "node" and first_issue.issue_type == "node_state":
+    if is_node_down(active_issues):
         return f"⚠️ BrightID node is down\nNode: {first_issue.group_name}"
 
     if first_issue.group_type == "node":
@@ -147,11 +245,7 @@ def build_active_group_message(
 
     active_lines = "\n".join(f"- {issue_summary(issue)}" for issue in active_issues)
     sections.append(f"Active:\n{active_lines}")
-
-    oldest_started_at = min(issue.started_at for issue in active_issues)
-    return (
-        f"{header}\n\n" + "\n\n".join(sections) + f"\n\n{how_long(oldest_started_at)}"
-    )
+    return f"{header}\n\n" + "\n\n".join(sections)
 
 
 def build_resolved_group_message(group_id: str, issues: list[Issue]) -> str:
@@ -168,88 +262,501 @@ def build_resolved_group_message(group_id: str, issues: list[Issue]) -> str:
 
 def delete_issues(issues: list[Issue]) -> None:
     for issue in issues:
-        delete_issue(issue.id)
+        delete_issue(issue)
+
+
+def route_group_id(group_id: str, route: str) -> str:
+    """Return the id of the alert group tracking a group's alerts on a route."""
+    if route == DEFAULT_ROUTE:
+        return group_id
+    return f"{group_id}@{route}"
+
+
+@dataclass
+class GroupNotification:
+    """A group notification for one route that became due in the current pass."""
+
+    group_id: str
+    group_name: str
+    route: str
+    group: AlertGroup
+    state: GroupState
+    message: str
+    digest_line: str
+    issues_to_delete: list[Issue]
+    # Time of the last issue change, to measure the notification latency.
+    changed_at: int
+    resolved: bool = False
+    fingerprint: str = ""
+    # Outcome of the delivery attempt: whether it was sent and when the group
+    # needs to be checked again because of it.
+    sent: bool = False
+    next_check: float = 0
+
+    @property
+    def delivery_id(self) -> str:
+        if self.resolved:
+            return f"resolved:{self.group.alert_number}"
+        return f"{self.group.alert_number + 1}:{self.fingerprint}"
+
+
+def handle_issue_group(
+    group_id: str, state: GroupState, issues: list[Issue]
+) -> tuple[float, list[GroupNotification]]:
+    """Check grouped issues using group-level timing, tracked per route.
+
+    Returns the timestamp at which the group needs to be checked again if its
+    version does not change before that, and the notifications due now.
+    """
+    if not issues:
+        return NEVER, []
+
+    current_timestamp = int(clock.now())
+    first_seen = min(issue.started_at for issue in issues)
+    active_issues = visible_active_issues(issues, inhibited)
+    resolved_issues = [issue for issue in issues if issue.resolved]
+    group_name = issues[0].group_name
+    changed_at = max(issue.updated_at for issue in issues)
+
+    if not active_issues and not all(issue.resolved for issue in issues):
+        # Everything still active is inhibited; wait for the inhibition to end.
+        return NEVER, []
+
+    next_check = NEVER
+    notifications = []
+    for route in router.group_routes(issues):
+        alert_group_id = route_group_id(group_id, route)
+        group = alert_group_store.get_or_create_group(
+            alert_group_id, first_seen=first_seen
+        )
 
+        if not active_issues:
+            if group.last_alert == 0:
+                # Nothing was sent on this route, so there is nothing to resolve.
+                alert_group_store.delete_group(alert_group_id)
+                continue
+
+            notifications.append(
+                GroupNotification(
+                    group_id,
+                    group_name,
+                    route,
+                    group,
+                    state,
+                    build_resolved_group_message(group_id, issues),
+                    f"✅ {group_name}: issues resolved",
+                    issues,
+                    changed_at,
+                    resolved=True,
+                )
+            )
+            continue
+
+        fingerprint = group_fingerprint(active_issues)
+        next_send = next_active_group_send(group, fingerprint)
+        if current_timestamp < next_send:
+            next_check = min(next_check, next_send)
+            continue
+
+        if state.body_version != state.version:
+            state.body = build_active_group_body(active_issues, resolved_issues)
+            state.body_version = state.version
+        summaries = "; ".join(issue_summary(issue) for issue in active_issues)
+        notifications.append(
+            GroupNotification(
+                group_id,
+                group_name,
+                route,
+                group,
+                state,
+                build_active_group_message(active_issues, resolved_issues, state.body),
+                f"⚠️ {group_name}: {summaries}",
+                resolved_issues,
+                changed_at,
+                fingerprint=fingerprint,
+            )
+        )
 
-def handle_issue_group(group_id: str, issues: list[Issue]) -> None:
-    """Check and process grouped issues using group-level timing."""
-    group = alert_group_store.get_or_create_group(
-        group_id, first_seen=min(issue.started_at for issue in issues)
+    if not active_issues and not notifications:
+        delete_issues(issues)
+    return next_check, notifications
+
+
+def complete_notification(
+    notification: GroupNotification, sent_at: int, channels: list[str]
+) -> None:
+    """Record a delivered notification in the alert state of its route."""
+    history_store.record_notification(
+        notification.group_id,
+        notification.group_name,
+        [f"{notification.route}:{channel}" for channel in channels],
+        sent_at - notification.changed_at,
+        notification.fingerprint,
     )
-    current_timestamp = int(time.time())
-    active_issues = visible_active_issues(issues)
-    resolved_issues = [issue for issue in issues if issue.resolved]
+    alert_group_id = route_group_id(notification.group_id, notification.route)
+    notification.sent = True
+    if notification.resolved:
+        alert_group_store.delete_group(alert_group_id)
+        notification.next_check = NEVER
+        return
 
-    if not active_issues:
-        if group.last_alert == 0:
-            delete_issues(issues)
-            alert_group_store.delete_group(group_id)
-            return
+    alert_group_store.update_group_state(
+        alert_group_id,
+        sent_at,
+        notification.group.alert_number + 1,
+        notification.fingerprint,
+    )
+    notification.next_check = sent_at + config.REPEAT_INTERVAL
 
-        if send_alerts(build_resolved_group_message(group_id, issues)):
-            delete_issues(issues)
-            alert_group_store.delete_group(group_id)
+
+def send_notification(notification: GroupNotification) -> None:
+    """Send one group notification on its own."""
+    channels = send_alerts(
+        notification.message,
+        notification.route,
+        route_group_id(notification.group_id, notification.route),
+        notification.delivery_id,
+    )
+    if channels:
+        complete_notification(notification, int(clock.now()), channels)
+
+
+def build_digest_message(notifications: list[GroupNotification]) -> str:
+    count = len(notifications)
+    lines = "\n".join(sorted(n.digest_line for n in notifications))
+    return f"⚠️ BrightID alert digest: {count} alert groups changed\n\n{lines}"
+
+
+def digest_fingerprint(notifications: list[GroupNotification]) -> str:
+    return hashlib.sha256(
+        "|".join(
+            sorted(f"{n.group_id}:{n.fingerprint or 'resolved'}" for n in notifications)
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def send_digest(route: str, notifications: list[GroupNotification]) -> None:
+    """Send the due group notifications of a route as one digest.
+
+    The digest has its own alert group per route, so a changed digest is sent
+    at most once per GROUP_INTERVAL and an unchanged one once per
+    REPEAT_INTERVAL. Groups that were never notified are not held back: while
+    the digest waits, they are sent at once, on their own or in a digest of
+    their own when there are many of them.
+    """
+    current_timestamp = int(clock.now())
+    digest_group_id = route_group_id(DIGEST_GROUP_ID, route)
+    digest = alert_group_store.get_or_create_group(
+        digest_group_id, first_seen=current_timestamp
+    )
+    fingerprint = digest_fingerprint(notifications)
+
+    if digest.last_alert:
+        next_send = next_active_group_send(digest, fingerprint)
+        if current_timestamp < next_send:
+            new_notifications = []
+            for notification in notifications:
+                if notification.group.last_alert == 0:
+                    new_notifications.append(notification)
+                else:
+                    notification.next_check = next_send
+            if len(new_notifications) <= config.DIGEST_THRESHOLD:
+                for notification in new_notifications:
+                    send_notification(notification)
+                return
+            notifications = new_notifications
+            fingerprint = digest_fingerprint(notifications)
+
+    channels = send_alerts(
+        build_digest_message(notifications),
+        route,
+        digest_group_id,
+        f"{digest.alert_number + 1}:{fingerprint}",
+    )
+    if not channels:
         return
 
-    fingerprint = group_fingerprint(active_issues)
-    if not should_send_active_group(group, fingerprint, current_timestamp):
+    alert_group_store.update_group_state(
+        digest_group_id, current_timestamp, digest.alert_number + 1, fingerprint
+    )
+    for notification in notifications:
+        complete_notification(notification, current_timestamp, channels)
+
+
+def finish_groups(notifications: list[GroupNotification]) -> None:
+    """Schedule the groups that had notifications due in this pass.
+
+    Issues reported as resolved are only deleted once every route of the
+    group got its notification; routes that failed are retried on the next
+    pass without resending to the others.
+    """
+    groups: dict[str, list[GroupNotification]] = {}
+    for notification in notifications:
+        groups.setdefault(notification.group_id, []).append(notification)
+
+    for group_notifications in groups.values():
+        state = group_notifications[0].state
+        state.next_check = min(
+            state.next_check, *(n.next_check for n in group_notifications)
+        )
+        if all(notification.sent for notification in group_notifications):
+            delete_issues(group_notifications[0].issues_to_delete)
+
+
+def update_inhibition() -> None:
+    """Recompute cross-group inhibition from the active issues of all groups.
+
+    Every group is checked again when the result changes, since any of them
+    may show or hide issues because of it.
+    """
+    global inhibited
+    current = inhibitor.inhibited(
+        source_type
+        for state in group_states.values()
+        for source_type in state.source_types
+    )
+    if current == inhibited:
         return
 
-    if send_alerts(build_active_group_message(active_issues, resolved_issues)):
-        alert_group_store.update_group_state(
-            group_id,
-            current_timestamp,
-            group.alert_number + 1,
-            fingerprint,
+    logging.info(f"Inhibited issues changed to {sorted(current)}")
+    inhibited = current
+    for state in group_states.values():
+        state.next_check = 0
+        state.body_version = None
+
+
+def process_issue_groups() -> None:
+    """Process the groups whose version changed or whose next send is due."""
+    versions = issue_store.group_versions()
+    for group_id in set(group_states) - set(versions):
+        del group_states[group_id]
+        status_snapshot.set_group(group_id, None)
+
+    current_timestamp = int(clock.now())
+    fetched_groups = {}
+    for index, (group_id, version) in enumerate(versions.items()):
+        heartbeat.stage("fetch_groups", backlog=len(versions) - index)
+        state = group_states.get(group_id)
+        if state is None:
+            state = group_states[group_id] = GroupState(version)
+        elif state.version == version and current_timestamp < state.next_check:
+            continue
+
+        try:
+            issues = issue_store.fetch_group_issues(group_id)
+        except Exception as e:
+            logging.error(f"Failed to fetch issues of group {group_id}: {e}")
+            continue
+
+        # Retry on the next pass if handling the group fails half way.
+        state.version = version
+        state.next_check = 0
+        state.source_types = inhibitor.source_types(
+            issue.issue_type for issue in issues if not issue.resolved
         )
-        delete_issues(resolved_issues)
+        fetched_groups[group_id] = issues
+
+    update_inhibition()
+
+    due_notifications: dict[str, list[GroupNotification]] = {}
+    for index, (group_id, issues) in enumerate(fetched_groups.items()):
+        heartbeat.stage("process_groups", backlog=len(fetched_groups) - index)
+        state = group_states[group_id]
+        state.next_check, notifications = handle_issue_group(group_id, state, issues)
+        status_snapshot.set_group(group_id, group_status(issues))
+        for notification in notifications:
+            due_notifications.setdefault(notification.route, []).append(notification)
+
+    for route, notifications in due_notifications.items():
+        heartbeat.stage(f"send_notifications:{route}", backlog=len(notifications))
+        if len(notifications) > config.DIGEST_THRESHOLD:
+            send_digest(route, notifications)
+            continue
+
+        for notification in notifications:
+            send_notification(notification)
+
+    finish_groups(
+        [n for notifications in due_notifications.values() for n in notifications]
+    )
 
 
 class KeybaseBot:
-    """Singleton wrapper for the Keybase bot instance."""
+    """Singleton wrapper for the Keybase bot instance.
+
+    pykeybasebot is slow to import and the bot has to log in before its first
+    message, so both happen in the background right after startup.
+    """
 
     _instance = None
+    _lock = Lock()
 
     @staticmethod
     def get_instance():
-        if KeybaseBot._instance is None:
-            KeybaseBot._instance = Bot(
-                username=config.KEYBASE_BOT_USERNAME,
-                paperkey=config.KEYBASE_BOT_KEY,
-                handler=None,
-            )
+        with KeybaseBot._lock:
+            if KeybaseBot._instance is None:
+                from pykeybasebot import Bot
+
+                KeybaseBot._instance = Bot(
+                    username=config.KEYBASE_BOT_USERNAME,
+                    paperkey=config.KEYBASE_BOT_KEY,
+                    handler=None,
+                )
         return KeybaseBot._instance
 
-
-def send_alerts(message: str) -> bool:
-    """Sends an alert via Keybase and Telegram."""
-    keybase_sent = send_keybase_alert(message)
-    telegram_sent = send_telegram_alert(message)
-    return bool(keybase_sent or telegram_sent)
+    @staticmethod
+    def prewarm() -> None:
+        """Create and log in the bot before the first alert needs it."""
+        started = time.perf_counter()
+        loop = get_event_loop()
+        for attempt in range(config.KEYBASE_WARMUP_ATTEMPTS):
+            try:
+                bot = KeybaseBot.get_instance()
+                loop.run_until_complete(bot.ensure_initialized())
+                logging.info(
+                    f"Keybase client ready after {time.perf_counter() - started:.2f}s"
+                )
+                return
+            except Exception as e:
+                # The keybase service starts next to us and may not be up yet.
+                logging.warning(f"Keybase warmup attempt {attempt + 1} failed: {e}")
+                time.sleep(2)
+        logging.error("Keybase client warmup failed; it will retry on first send.")
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop of the current thread, creating one if needed."""
+    try:
+        return asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        return loop
+
+
+def split_message(message: str, limit: int) -> list[str]:
+    """Split a message on line boundaries into ordered chunks under `limit`.
+
+    Every chunk ends with a part counter and the chunks after the first repeat
+    the first line of the message, so each one can be read on its own.
+    """
+    if len(message) <= limit:
+        return [message]
+
+    header = message.split("\n", 1)[0]
+    marker_size = len("\n(part 999/999)")
+    # The repeated header may take at most half of a chunk.
+    if len(header) > limit // 2:
+        header = header[: limit // 2 - 1] + "…"
+    budget = max(limit - marker_size - len(header) - 1, 1)
+    chunks = []
+    current = ""
+    for line in message.split("\n"):
+        if len(line) > budget:
+            line = line[: budget - 1] + "…"
+        if current and len(current) + 1 + len(line) > budget:
+            chunks.append(current)
+            current = f"{header}\n{line}"
+        else:
+            current = f"{current}\n{line}" if current else line
+    chunks.append(current)
+
+    total = len(chunks)
+    return [f"{chunk}\n(part {i}/{total})" for i, chunk in enumerate(chunks, 1)]
+
+
+# Chunks already delivered per group, keyed by the id of the notification
+# being delivered and then by channel, so a retry only sends what is missing.
+pending_deliveries: dict[str, tuple[str, dict[str, set[int]]]] = {}
+
+
+def send_chunks(
+    message: str, sender: Callable[[str], bool], limit: int, delivered: set[int]
+) -> bool:
+    """Send the missing chunks of a message in order; stop at the first failure."""
+    for index, chunk in enumerate(split_message(message, limit)):
+        if index in delivered:
+            continue
+        if not sender(chunk):
+            return False
+        delivered.add(index)
+    return True
+
+
+def send_alerts(
+    message: str,
+    route: str = DEFAULT_ROUTE,
+    group_id: Optional[str] = None,
+    delivery_id: str = "",
+) -> list[str]:
+    """Sends an alert to the Keybase channel and Telegram chat of a route.
+
+    Returns the channels that received the whole message once every channel
+    of the route has, and an empty list until then. With a group and delivery
+    id, chunks delivered by an earlier attempt of the same notification are
+    not sent again, so a retry only resends what is missing.
+    """
+    destination = router.routes[route]
+    delivered = {}
+    if group_id is not None:
+        pending_id, delivered = pending_deliveries.get(group_id, ("", {}))
+        if pending_id != delivery_id:
+            delivered = {}
+        pending_deliveries[group_id] = (delivery_id, delivered)
+
+    channels = 0
+    sent_channels = []
+    for channel, target, sender, limit in (
+        (
+            "keybase",
+            destination.keybase_channel,
+            send_keybase_alert,
+            config.KEYBASE_MESSAGE_LIMIT,
+        ),
+        (
+            "telegram",
+            destination.telegram_chat,
+            send_telegram_alert,
+            config.TELEGRAM_MESSAGE_LIMIT,
+        ),
+    ):
+        if not target:
+            continue
+        channels += 1
+        if send_chunks(
+            message,
+            partial(sender, target=target),
+            limit,
+            delivered.setdefault(channel, set()),
+        ):
+            sent_channels.append(channel)
+
+    if len(sent_channels) < channels:
+        # Kept pending, so the next attempt only sends the missing chunks.
+        return []
+    if group_id is not None:
+        del pending_deliveries[group_id]
+    return sent_channels
 
 
-def send_keybase_alert(message: str) -> bool:
-    """Sends an alert via Keybase."""
+def send_keybase_alert(message: str, target: dict) -> bool:
+    """Sends an alert to a Keybase channel."""
     try:
-        bot = KeybaseBot.get_instance()
-        channel = chat1.ChatChannel(**config.KEYBASE_BOT_CHANNEL)
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        import pykeybasebot.types.chat1 as chat1
 
-        loop.run_until_complete(bot.chat.send(channel, message))
+        bot = KeybaseBot.get_instance()
+        channel = chat1.ChatChannel(**target)
+        get_event_loop().run_until_complete(bot.chat.send(channel, message))
         return True
     except Exception as e:
         logging.error(f"Keybase error: {e}")
         return False
 
 
-def send_telegram_alert(message: str) -> bool:
-    """Sends an alert via Telegram."""
+def send_telegram_alert(message: str, target: str) -> bool:
+    """Sends an alert to a Telegram chat."""
     try:
-        request_data = {"chat_id": config.TELEGRAM_BOT_CHANNEL, "text": message}
+        request_data = {"chat_id": target, "text": message}
         url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_KEY}/sendMessage"
         response = requests.post(
             url,
@@ -264,21 +771,65 @@ def send_telegram_alert(message: str) -> bool:
         return False
 
 
+def compact_groups() -> None:
+    """Forget groups whose issues are gone and remove orphaned alert groups."""
+    forgotten = 0
+    for group_id in issue_store.group_versions():
+        if issue_store.prune_group(group_id):
+            alert_group_store.delete_group(group_id)
+            forgotten += 1
+
+    versions = issue_store.group_versions()
+    for alert_group_id in alert_group_store.scan_group_ids():
+        # Alert groups of other routes than the default have an @route suffix.
+        group_id = alert_group_id.split("@", 1)[0]
+        if group_id not in versions and group_id != DIGEST_GROUP_ID:
+            alert_group_store.delete_group(alert_group_id)
+            forgotten += 1
+
+    if forgotten:
+        logging.info(f"Compaction removed {forgotten} empty alert groups.")
+
+
+def compaction_loop() -> None:
+    """Periodically compact alert group keys in the background."""
+    while True:
+        time.sleep(config.COMPACTION_INTERVAL)
+        try:
+            compact_groups()
+        except Exception as e:
+            logging.error(f"Error compacting alert groups: {e}")
+
+
 def main() -> None:
     """Main function to check and process all issues."""
+    try:
+        issue_store.rebuild_group_index()
+    except Exception as e:
+        logging.error(f"Failed to rebuild the group issue index: {e}")
+    startup_timer.mark("group index")
+
     while True:
+        heartbeat.start_cycle()
         try:
-            issues = fetch_issues()
-            grouped_issues = group_issues_by_group_id(issues)
-            for group_id, issues_group in grouped_issues.items():
-                handle_issue_group(group_id, issues_group)
-            update_health_status()
+            process_issue_groups()
+            heartbeat.finish_cycle()
+            startup_timer.finish("first pass")
         except Exception as e:
             logging.error(f"Error in alert_service: {e}")
+            heartbeat.record_error()
         time.sleep(config.CHECK_INTERVAL * 2)
 
 
 if __name__ == "__main__":
     logging.info("Starting Alert Service...")
+    Thread(target=KeybaseBot.prewarm, daemon=True).start()
     alert_thread = Thread(target=main)
     alert_thread.start()
+    Thread(target=compaction_loop, daemon=True).start()
+    start_status_api(
+        status_snapshot,
+        redis_client,
+        config.STATUS_API_PORT,
+        config.STATUS_REFRESH_INTERVAL,
+    )
@@ -1,9 +1,11 @@
 import json
 import os
+from typing import Any
 
 
-def get_json_env(name: str) -> dict:
-    """Read an environment variable that must contain a JSON object."""
+def get_json_env(name: str, expected_type: type = dict) -> Any:
+    """Read an environment variable that must contain a JSON object, or a
+    JSON array with `expected_type=list`."""
     try:
         value = os.environ[name]
     except KeyError as e:
@@ -14,20 +16,32 @@ def get_json_env(name: str) -> dict:
     except json.JSONDecodeError as e:
         raise RuntimeError(f"{name} must be valid JSON: {e}") from e
 
-    if not isinstance(data, dict):
-        raise RuntimeError(f"{name} must be a JSON object")
+    if not isinstance(data, expected_type):
+        kind = "object" if expected_type is dict else "array"
+        raise RuntimeError(f"{name} must be a JSON {kind}")
     return data
 
 
 KEYBASE_BOT_KEY = os.environ["KEYBASE_BOT_KEY"]
 KEYBASE_BOT_USERNAME = os.environ["KEYBASE_BOT_USERNAME"]
 KEYBASE_BOT_CHANNEL = get_json_env("KEYBASE_BOT_CHANNEL")
+KEYBASE_WARMUP_ATTEMPTS = int(os.environ["KEYBASE_WARMUP_ATTEMPTS"])
+KEYBASE_MESSAGE_LIMIT = int(os.environ["KEYBASE_MESSAGE_LIMIT"])
 TELEGRAM_BOT_KEY = os.environ["TELEGRAM_BOT_KEY"]
 TELEGRAM_BOT_CHANNEL = os.environ["TELEGRAM_BOT_CHANNEL"]
+TELEGRAM_MESSAGE_LIMIT = int(os.environ["TELEGRAM_MESSAGE_LIMIT"])
+ALERT_ROUTES = get_json_env("ALERT_ROUTES", list)
 CHECK_INTERVAL = int(os.environ["CHECK_INTERVAL"])
 GROUP_WAIT = int(os.environ["GROUP_WAIT"])
 GROUP_INTERVAL = int(os.environ["GROUP_INTERVAL"])
 REPEAT_INTERVAL = int(os.environ["REPEAT_INTERVAL"])
+DIGEST_THRESHOLD = int(os.environ["DIGEST_THRESHOLD"])
+GROUP_IDLE_TTL = int(os.environ["GROUP_IDLE_TTL"])
+COMPACTION_INTERVAL = int(os.environ["COMPACTION_INTERVAL"])
+FLAP_SCORE_BORDER = int(os.environ["FLAP_SCORE_BORDER"])
+HISTORY_MAX_EVENTS = int(os.environ["HISTORY_MAX_EVENTS"])
+STATUS_API_PORT = int(os.environ["STATUS_API_PORT"])
+STATUS_REFRESH_INTERVAL = int(os.environ["STATUS_REFRESH_INTERVAL"])
 MAX_RETRIES = int(os.environ["MAX_RETRIES"])
 HTTP_CONNECT_TIMEOUT = int(os.environ["HTTP_CONNECT_TIMEOUT"])
 HTTP_READ_TIMEOUT = int(os.environ["HTTP_READ_TIMEOUT"])
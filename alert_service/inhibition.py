@@ -0,0 +1,63 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterable
+
+# Node issues that are derived from IDChain RPC data (the chain head, balances
+# and transaction counts) and misfire while the RPC is unavailable.
+RPC_DERIVED_NODE_ISSUES = frozenset(
+    {
+        "node_balance",
+        "receiver",
+        "scorer",
+        "sender",
+        "apps_updater",
+        "sponsorships_updater",
+        "seed_groups_updater",
+        "peer_divergence",
+    }
+)
+
+
+@dataclass(frozen=True)
+class InhibitionRule:
+    """While an issue of `source_type` is active anywhere, hide the
+    `target_types` issues in all groups of `target_group_type`."""
+
+    source_type: str
+    target_group_type: str
+    target_types: frozenset[str]
+
+
+INHIBITION_RULES = (
+    InhibitionRule("idchain_rpc", "node", RPC_DERIVED_NODE_ISSUES),
+    InhibitionRule("idchain_rpc", "system", frozenset({"network_stall"})),
+    InhibitionRule("node_one_state", "node", frozenset({"node_version"})),
+    InhibitionRule("network_stall", "node", frozenset({"receiver", "peer_divergence"})),
+)
+
+
+class Inhibitor:
+    """Evaluate inhibition rules indexed by their source issue type."""
+
+    def __init__(self, rules: Iterable[InhibitionRule]):
+        self.rules_by_source: dict[str, list[InhibitionRule]] = defaultdict(list)
+        for rule in rules:
+            self.rules_by_source[rule.source_type].append(rule)
+
+    def source_types(self, issue_types: Iterable[str]) -> frozenset[str]:
+        """Return the given issue types that are the source of some rule."""
+        return frozenset(
+            issue_type
+            for issue_type in issue_types
+            if issue_type in self.rules_by_source
+        )
+
+    def inhibited(self, source_types: Iterable[str]) -> frozenset[tuple[str, str]]:
+        """Return the (group_type, issue_type) pairs hidden while the given
+        source issue types are active."""
+        return frozenset(
+            (rule.target_group_type, target_type)
+            for source_type in source_types
+            for rule in self.rules_by_source.get(source_type, ())
+            for target_type in rule.target_types
+        )
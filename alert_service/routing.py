@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from shared.issue_store import Issue
+
+DEFAULT_ROUTE = "default"
+# Issue fields a route can match on.
+MATCH_FIELDS = ("severity", "group_type", "issue_type", "group_name")
+
+
+@dataclass(frozen=True)
+class Route:
+    """A destination for alerts: a Keybase channel and/or a Telegram chat."""
+
+    name: str
+    keybase_channel: Optional[dict] = None
+    telegram_chat: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class RouteRule:
+    """Send issues whose fields match to `route`.
+
+    `match` maps a field of MATCH_FIELDS to the accepted values; fields left
+    out match anything. Evaluation stops at the first matching rule unless it
+    sets `continue_matching`.
+    """
+
+    route: Route
+    match: dict[str, frozenset[str]]
+    continue_matching: bool = False
+
+
+def parse_routes(
+    routes_data: list[dict], default_route: Route
+) -> list[RouteRule]:
+    """Build route rules from the ALERT_ROUTES configuration."""
+    rules = []
+    for route_data in routes_data:
+        match = {}
+        for field, values in route_data.get("match", {}).items():
+            if field not in MATCH_FIELDS:
+                raise ValueError(f"Route {route_data['name']} matches on {field}")
+            match[field] = frozenset([values] if isinstance(values, str) else values)
+        rules.append(
+            RouteRule(
+                Route(
+                    route_data["name"],
+                    route_data.get("keybase_channel"),
+                    route_data.get("telegram_chat"),
+                ),
+                match,
+                route_data.get("continue", False),
+            )
+        )
+    # Issues that no rule stops on also go to the default route.
+    rules.append(RouteRule(default_route, {}))
+    return rules
+
+
+class Router:
+    """Route rules compiled into per-field lookup tables.
+
+    For each field, a dict maps every value named by some rule to the bitmask
+    of rules accepting it, and a second mask holds the rules that do not
+    constrain the field. ANDing one lookup per field gives all matching rules,
+    so routing an issue does not depend on the number of rules.
+    """
+
+    def __init__(self, rules: list[RouteRule]):
+        self.rules = rules
+        self.routes = {rule.route.name: rule.route for rule in rules}
+        self.index: dict[str, dict[str, int]] = {field: {} for field in MATCH_FIELDS}
+        self.wildcards = dict.fromkeys(MATCH_FIELDS, 0)
+        for position, rule in enumerate(rules):
+            bit = 1 << position
+            for field in MATCH_FIELDS:
+                if field not in rule.match:
+                    self.wildcards[field] |= bit
+                    continue
+                for value in rule.match[field]:
+                    self.index[field][value] = self.index[field].get(value, 0) | bit
+
+    def issue_routes(self, issue: Issue) -> list[str]:
+        matched = ~0
+        for field in MATCH_FIELDS:
+            value = getattr(issue, field)
+            matched &= self.index[field].get(value, 0) | self.wildcards[field]
+
+        routes = []
+        position = 0
+        while matched:
+            if matched & 1:
+                rule = self.rules[position]
+                if rule.route.name not in routes:
+                    routes.append(rule.route.name)
+                if not rule.continue_matching:
+                    break
+            matched >>= 1
+            position += 1
+        return routes
+
+    def group_routes(self, issues: Iterable[Issue]) -> list[str]:
+        """Return the routes of a group: those of any of its issues."""
+        routes = []
+        for issue in issues:
+            for route in self.issue_routes(issue):
+                if route not in routes:
+                    routes.append(route)
+        return routes
@@ -0,0 +1,141 @@
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Any, Optional
+
+from shared.node_state_store import NodeStateStore
+
+# Services that publish a health:<service> heartbeat.
+HEARTBEAT_SERVICES = ("monitor_service", "alert_service")
+
+
+class StatusSnapshot:
+    """In-memory state served by the status API.
+
+    Sections are replaced as the alert service and the refresh loop learn
+    about changes; each section keeps its rendered JSON and ETag until the
+    next change, so requests never reach Redis.
+    """
+
+    SECTIONS = ("groups", "nodes", "health")
+
+    def __init__(self):
+        self._lock = Lock()
+        self._data: dict[str, Any] = {section: {} for section in self.SECTIONS}
+        self._versions = {section: 0 for section in self.SECTIONS}
+        self._rendered: dict[str, tuple[str, bytes]] = {}
+        # Keeps ETags from an earlier process from matching after a restart.
+        self._epoch = int(time.time())
+
+    def set_group(self, group_id: str, group: Optional[dict]) -> None:
+        with self._lock:
+            groups = self._data["groups"]
+            if groups.get(group_id) == group:
+                return
+            if group is None:
+                del groups[group_id]
+            else:
+                groups[group_id] = group
+            self._changed("groups")
+
+    def set_section(self, section: str, data: dict) -> None:
+        with self._lock:
+            if self._data[section] == data:
+                return
+            self._data[section] = data
+            self._changed(section)
+
+    def _changed(self, section: str) -> None:
+        self._versions[section] += 1
+        self._rendered.pop(section, None)
+        self._rendered.pop("status", None)
+
+    def render(self, section: str) -> tuple[str, bytes]:
+        """Return the ETag and JSON body of a section, or of all of them for
+        "status"."""
+        with self._lock:
+            if section not in self._rendered:
+                if section == "status":
+                    data = self._data
+                    version = "-".join(str(v) for v in self._versions.values())
+                else:
+                    data = self._data[section]
+                    version = str(self._versions[section])
+                body = json.dumps(data, sort_keys=True).encode("utf-8")
+                etag = f'"{section}-{self._epoch}-{version}"'
+                self._rendered[section] = (etag, body)
+            return self._rendered[section]
+
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    snapshot: StatusSnapshot
+
+    def do_GET(self) -> None:
+        section = self.path.split("?", 1)[0].strip("/") or "status"
+        if section not in StatusSnapshot.SECTIONS and section != "status":
+            self.send_error(404)
+            return
+
+        etag, body = self.snapshot.render(section)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        # Polling dashboards would flood the service log.
+        pass
+
+
+def refresh_loop(
+    snapshot: StatusSnapshot, redis_client, refresh_interval: int
+) -> None:
+    """Keep the node and heartbeat sections up to date.
+
+    Node states are only loaded when their version counter changed, so the
+    Redis load is a few small reads per interval, whatever the request rate.
+    """
+    node_state_store = NodeStateStore(redis_client)
+    node_states_version = None
+    while True:
+        try:
+            version = node_state_store.get_version()
+            if version != node_states_version:
+                snapshot.set_section("nodes", node_state_store.get_states())
+                node_states_version = version
+
+            pipe = redis_client.pipeline()
+            for service in HEARTBEAT_SERVICES:
+                pipe.hgetall(f"health:{service}")
+            snapshot.set_section(
+                "health", dict(zip(HEARTBEAT_SERVICES, pipe.execute()))
+            )
+        except Exception as e:
+            logging.error(f"Error refreshing status snapshot: {e}")
+        time.sleep(refresh_interval)
+
+
+def start_status_api(
+    snapshot: StatusSnapshot, redis_client, port: int, refresh_interval: int
+) -> None:
+    StatusRequestHandler.snapshot = snapshot
+    server = ThreadingHTTPServer(("", port), StatusRequestHandler)
+    server.daemon_threads = True
+    Thread(
+        target=refresh_loop,
+        args=(snapshot, redis_client, refresh_interval),
+        daemon=True,
+    ).start()
+    Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"Status API listening on port {port}")
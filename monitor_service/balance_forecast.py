@@ -0,0 +1,150 @@
+import json
+import logging
+from array import array
+from typing import Optional
+
+import config
+
+from shared import clock
+
+
+class BalanceHistory:
+    """Downsampled history of one balance with its consumption trend.
+
+    Samples are kept in fixed-size arrays used as a ring buffer. The least
+    squares line through them is maintained with running sums that are
+    updated as samples enter and leave the window, so adding a sample costs
+    O(1) whatever the history size. A refill starts a new history, since the
+    trend before it says nothing about the consumption after it.
+    """
+
+    def __init__(self, size: int):
+        self.times = array("d", bytes(8 * size))
+        self.values = array("d", bytes(8 * size))
+        self.size = size
+        self.start = 0
+        self.count = 0
+        self.origin: Optional[float] = None
+        self.sum_t = self.sum_v = self.sum_tt = self.sum_tv = 0.0
+
+    def reset(self) -> None:
+        self.start = self.count = 0
+        self.origin = None
+        self.sum_t = self.sum_v = self.sum_tt = self.sum_tv = 0.0
+
+    def last(self) -> Optional[tuple[float, float]]:
+        if self.count == 0:
+            return None
+        position = (self.start + self.count - 1) % self.size
+        return self.origin + self.times[position], self.values[position]
+
+    def add(self, timestamp: float, value: float) -> None:
+        last = self.last()
+        if last is not None and value > last[1]:
+            self.reset()
+        if self.origin is None:
+            # Times relative to the first sample keep the sums precise.
+            self.origin = timestamp
+
+        t = timestamp - self.origin
+        if self.count == self.size:
+            old_t, old_v = self.times[self.start], self.values[self.start]
+            self.sum_t -= old_t
+            self.sum_v -= old_v
+            self.sum_tt -= old_t * old_t
+            self.sum_tv -= old_t * old_v
+            self.start = (self.start + 1) % self.size
+            self.count -= 1
+
+        position = (self.start + self.count) % self.size
+        self.times[position] = t
+        self.values[position] = value
+        self.count += 1
+        self.sum_t += t
+        self.sum_v += value
+        self.sum_tt += t * t
+        self.sum_tv += t * value
+
+    def consumption_rate(self) -> Optional[float]:
+        """Return the fitted consumption per second, or None without a trend."""
+        if self.count < 2:
+            return None
+        variance = self.count * self.sum_tt - self.sum_t * self.sum_t
+        if variance <= 0:
+            return None
+        slope = (self.count * self.sum_tv - self.sum_t * self.sum_v) / variance
+        return -slope
+
+    def time_to_empty(self) -> Optional[float]:
+        """Return the seconds until the balance runs out at the fitted rate."""
+        if self.count < config.BALANCE_FORECAST_MIN_SAMPLES:
+            return None
+        rate = self.consumption_rate()
+        if rate is None or rate <= 0:
+            return None
+        return max(self.last()[1], 0) / rate
+
+    def samples(self) -> list[tuple[float, float]]:
+        return [
+            (
+                self.origin + self.times[(self.start + i) % self.size],
+                self.values[(self.start + i) % self.size],
+            )
+            for i in range(self.count)
+        ]
+
+
+class BalanceForecaster:
+    """Balance histories of consensus senders and apps, snapshotted to Redis."""
+
+    KEY = "balance_history"
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.histories: dict[str, BalanceHistory] = {}
+        self.loaded = False
+
+    def load(self) -> None:
+        try:
+            histories_data = self.redis_client.hgetall(self.KEY)
+        except Exception as e:
+            logging.error(f"Failed to load balance histories: {e}")
+            return
+
+        self.loaded = True
+        for key, data in histories_data.items():
+            history = BalanceHistory(config.BALANCE_HISTORY_SIZE)
+            try:
+                for timestamp, value in json.loads(data):
+                    history.add(timestamp, value)
+            except (ValueError, TypeError) as e:
+                logging.error(f"Error parsing balance history of {key}: {e}")
+                continue
+            self.histories.setdefault(key, history)
+
+    def observe(self, key: str, balance: float) -> Optional[float]:
+        """Record a balance and return the forecast time to empty in seconds.
+
+        Balances are sampled at most once per BALANCE_SAMPLE_INTERVAL.
+        """
+        if not self.loaded:
+            self.load()
+
+        history = self.histories.setdefault(
+            key, BalanceHistory(config.BALANCE_HISTORY_SIZE)
+        )
+        now = clock.now()
+        last = history.last()
+        if last is None or now - last[0] >= config.BALANCE_SAMPLE_INTERVAL:
+            history.add(now, balance)
+            try:
+                self.redis_client.hset(self.KEY, key, json.dumps(history.samples()))
+            except Exception as e:
+                logging.error(f"Failed to save balance history of {key}: {e}")
+        return history.time_to_empty()
+
+    def forget(self, keys: list[str]) -> None:
+        for key in keys:
+            self.histories.pop(key, None)
+        if keys:
+            self.redis_client.hdel(self.KEY, *keys)
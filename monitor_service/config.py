@@ -2,20 +2,59 @@ import json
 import os
 
 NODES_INFO = json.loads(os.environ["NODES_INFO"])
+NODES_DISCOVERY_URL = os.environ["NODES_DISCOVERY_URL"]
+NODES_DISCOVERY_INTERVAL = int(os.environ["NODES_DISCOVERY_INTERVAL"])
 NODE_ONE_ETH_SIGNER = os.environ["NODE_ONE_ETH_SIGNER"]
 NODE_ONE_URL = os.environ["NODE_ONE_URL"]
 RECOVERY_SERVICE_URL = os.environ["RECOVERY_SERVICE_URL"]
 BACKUPS_SERVICE_URL = os.environ["BACKUPS_SERVICE_URL"]
 IDCHAIN_RPC_URL = os.environ["IDCHAIN_RPC_URL"]
+# A comma separated list of endpoints; requests are hedged across them.
+IDCHAIN_RPC_URLS = [url.strip() for url in IDCHAIN_RPC_URL.split(",") if url.strip()]
+RPC_HEDGE_QUANTILE = float(os.environ["RPC_HEDGE_QUANTILE"])
+RPC_HEDGE_DELAY = float(os.environ["RPC_HEDGE_DELAY"])
+RPC_MAX_BLOCK_LAG = int(os.environ["RPC_MAX_BLOCK_LAG"])
+RPC_FAILURE_COOLDOWN = int(os.environ["RPC_FAILURE_COOLDOWN"])
 RECEIVER_BORDER = int(os.environ["RECEIVER_BORDER"])
 SCORER_BORDER = int(os.environ["SCORER_BORDER"])
 BALANCE_BORDER = int(os.environ["BALANCE_BORDER"])
 BACKUP_BORDER = int(os.environ["BACKUP_BORDER"])
+BALANCE_EMPTY_HORIZON = int(os.environ["BALANCE_EMPTY_HORIZON"])
+BALANCE_SAMPLE_INTERVAL = int(os.environ["BALANCE_SAMPLE_INTERVAL"])
+BALANCE_HISTORY_SIZE = int(os.environ["BALANCE_HISTORY_SIZE"])
+BALANCE_FORECAST_MIN_SAMPLES = int(os.environ["BALANCE_FORECAST_MIN_SAMPLES"])
 SPONSORSHIPS_UPDATE_BORDER = int(os.environ["SPONSORSHIPS_UPDATE_BORDER"])
 APPS_UPDATE_BORDER = int(os.environ["APPS_UPDATE_BORDER"])
 SEED_GROUPS_UPDATE_BORDER = int(os.environ["SEED_GROUPS_UPDATE_BORDER"])
+PEER_DIVERGENCE_FACTOR = float(os.environ["PEER_DIVERGENCE_FACTOR"])
+NETWORK_STALL_RATIO = float(os.environ["NETWORK_STALL_RATIO"])
+LATENCY_P95_BORDER = float(os.environ["LATENCY_P95_BORDER"])
+LATENCY_WINDOW = int(os.environ["LATENCY_WINDOW"])
+LATENCY_MIN_SAMPLES = int(os.environ["LATENCY_MIN_SAMPLES"])
 SNAPSHOT_PERIOD = int(os.environ["SNAPSHOT_PERIOD"])
+CONSENSUS_SENDER_GRACE_BLOCKS = int(os.environ["CONSENSUS_SENDER_GRACE_BLOCKS"])
+CONSENSUS_SCAN_BATCH = int(os.environ["CONSENSUS_SCAN_BATCH"])
+CONSENSUS_SCAN_MAX_LAG = int(os.environ["CONSENSUS_SCAN_MAX_LAG"])
+FLAP_OPEN_SAMPLES = int(os.environ["FLAP_OPEN_SAMPLES"])
+FLAP_WINDOW = int(os.environ["FLAP_WINDOW"])
+FLAP_RESOLVE_SAMPLES = int(os.environ["FLAP_RESOLVE_SAMPLES"])
+FLAP_SCORE_WINDOW = int(os.environ["FLAP_SCORE_WINDOW"])
+RESOLVED_ISSUE_TTL = int(os.environ["RESOLVED_ISSUE_TTL"])
+PROBE_LOG_DIR = os.environ["PROBE_LOG_DIR"]
+PROBE_AGENT_NAME = os.environ["PROBE_AGENT_NAME"]
+PROBE_QUORUM = int(os.environ["PROBE_QUORUM"])
+PROBE_RESULT_MAX_AGE = int(os.environ["PROBE_RESULT_MAX_AGE"])
+PROBE_RESULTS_MAX_LEN = int(os.environ["PROBE_RESULTS_MAX_LEN"])
+HISTORY_MAX_EVENTS = int(os.environ["HISTORY_MAX_EVENTS"])
+ISSUE_SPOOL_PATH = os.environ["ISSUE_SPOOL_PATH"]
+ISSUE_SPOOL_FSYNC_INTERVAL = int(os.environ["ISSUE_SPOOL_FSYNC_INTERVAL"])
+ISSUE_SPOOL_RETRY_INTERVAL = int(os.environ["ISSUE_SPOOL_RETRY_INTERVAL"])
 CHECK_INTERVAL = int(os.environ["CHECK_INTERVAL"])
+CHAIN_HEAD_POLL_INTERVAL = int(os.environ["CHAIN_HEAD_POLL_INTERVAL"])
+# Endpoint block heights older than a few head polls are no longer used to
+# rank the endpoints.
+RPC_BLOCK_HEIGHT_MAX_AGE = 3 * CHAIN_HEAD_POLL_INTERVAL
+CHAIN_HEAD_MAX_AGE = int(os.environ["CHAIN_HEAD_MAX_AGE"])
 MAX_RETRIES = int(os.environ["MAX_RETRIES"])
 HTTP_CONNECT_TIMEOUT = int(os.environ["HTTP_CONNECT_TIMEOUT"])
 HTTP_READ_TIMEOUT = int(os.environ["HTTP_READ_TIMEOUT"])
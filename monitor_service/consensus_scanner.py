@@ -0,0 +1,99 @@
+import logging
+from typing import Callable, Iterable, Optional
+
+import config
+
+
+class ConsensusScanner:
+    """Follow the transactions of consensus senders block by block.
+
+    New blocks are fetched with their transactions in one batched RPC request
+    per scan, starting after a checkpoint kept in Redis, so the RPC cost grows
+    with the number of new blocks instead of nodes times cycles. For every
+    known sender the scanner keeps how many transactions it sent and the last
+    block it sent one in.
+    """
+
+    KEY = "consensus_scan"
+
+    def __init__(
+        self,
+        redis_client,
+        rpc_batch: Callable[[list[tuple[str, list]]], Optional[list]],
+    ):
+        self.redis_client = redis_client
+        self.rpc_batch = rpc_batch
+        self.first_block: Optional[int] = None
+        self.scanned_block: Optional[int] = None
+        self.last_sent_blocks: dict[str, int] = {}
+        self.loaded = False
+
+    def load(self) -> None:
+        data = self.redis_client.hgetall(self.KEY)
+        self.loaded = True
+        if "first" not in data or "block" not in data:
+            return
+
+        self.first_block = int(data["first"])
+        self.scanned_block = int(data["block"])
+        for field, value in data.items():
+            if field.startswith("last:"):
+                self.last_sent_blocks[field[5:]] = int(value)
+
+    def save(self) -> None:
+        mapping = {"first": self.first_block, "block": self.scanned_block}
+        mapping.update(
+            (f"last:{sender}", block) for sender, block in self.last_sent_blocks.items()
+        )
+        self.redis_client.hset(self.KEY, mapping=mapping)
+
+    def scan(self, head_block: int, senders: Iterable[str]) -> None:
+        """Scan up to CONSENSUS_SCAN_BATCH blocks after the checkpoint."""
+        if not self.loaded:
+            self.load()
+
+        senders = {sender.lower() for sender in senders}
+        if (
+            self.scanned_block is None
+            or head_block - self.scanned_block > config.CONSENSUS_SCAN_MAX_LAG
+        ):
+            # Older blocks say nothing about the current state of the senders.
+            self.scanned_block = max(head_block - config.CONSENSUS_SCAN_BATCH, 0)
+            self.first_block = self.scanned_block + 1
+            self.last_sent_blocks.clear()
+            self.redis_client.delete(self.KEY)
+            logging.info(f"Consensus scan starts after block {self.scanned_block}")
+
+        first_block = self.scanned_block + 1
+        last_block = min(head_block, self.scanned_block + config.CONSENSUS_SCAN_BATCH)
+        if first_block > last_block:
+            return
+
+        blocks = self.rpc_batch(
+            [
+                ("eth_getBlockByNumber", [hex(number), True])
+                for number in range(first_block, last_block + 1)
+            ]
+        )
+        if blocks is None or any(not block for block in blocks):
+            logging.error(f"Failed to fetch blocks {first_block}-{last_block}.")
+            return
+
+        for number, block in zip(range(first_block, last_block + 1), blocks):
+            for transaction in block.get("transactions", []):
+                sender = (transaction.get("from") or "").lower()
+                if sender in senders:
+                    self.last_sent_blocks[sender] = number
+        self.scanned_block = last_block
+        self.save()
+
+    def last_sent_block(self, sender: str) -> Optional[int]:
+        return self.last_sent_blocks.get(sender.lower())
+
+    def covers(self, from_block: int, to_block: int) -> bool:
+        """Whether every block after `from_block` up to `to_block` was scanned."""
+        return (
+            self.scanned_block is not None
+            and self.first_block <= from_block + 1
+            and self.scanned_block >= to_block
+        )
@@ -0,0 +1,44 @@
+from collections import deque
+
+
+class FlapDamper:
+    """Track recent check results per issue and damp open/resolve transitions.
+
+    An issue opens once `open_samples` of the last `window` samples failed and
+    resolves after `resolve_samples` consecutive passing samples. The flap
+    score is the number of pass/fail transitions in the last `score_window`
+    samples, which is usually much longer than the other two.
+    """
+
+    def __init__(
+        self, open_samples: int, window: int, resolve_samples: int, score_window: int
+    ):
+        self.open_samples = open_samples
+        self.resolve_samples = resolve_samples
+        self.history_size = max(window, resolve_samples, score_window)
+        self.window = window
+        self.score_window = score_window
+        self.samples: dict[str, deque[bool]] = {}
+
+    def record(self, issue_id: str, failing: bool) -> None:
+        samples = self.samples.setdefault(issue_id, deque(maxlen=self.history_size))
+        samples.append(failing)
+
+    def should_open(self, issue_id: str) -> bool:
+        samples = list(self.samples.get(issue_id, ()))[-self.window :]
+        return sum(samples) >= self.open_samples
+
+    def should_resolve(self, issue_id: str) -> bool:
+        samples = list(self.samples.get(issue_id, ()))[-self.resolve_samples :]
+        return len(samples) >= self.resolve_samples and not any(samples)
+
+    def flap_score(self, issue_id: str) -> int:
+        samples = list(self.samples.get(issue_id, ()))[-self.score_window :]
+        return sum(1 for prev, cur in zip(samples, samples[1:]) if prev != cur)
+
+    def is_passing(self, issue_id: str) -> bool:
+        """Whether every remembered sample passed."""
+        return not any(self.samples.get(issue_id, ()))
+
+    def forget(self, issue_id: str) -> None:
+        self.samples.pop(issue_id, None)
@@ -0,0 +1,194 @@
+import json
+import logging
+import math
+from typing import Optional
+
+import config
+
+from shared import clock
+
+
+class DDSketch:
+    """Streaming quantile sketch with bounded relative error (DDSketch).
+
+    Values are counted in logarithmic bins, so a quantile is off by at most
+    `relative_accuracy` of its value. When there are more than `max_bins`
+    bins the lowest ones are merged, which keeps memory fixed and only costs
+    accuracy at the low end, far from the tail quantiles that matter here.
+    Sketches with the same parameters can be merged.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.02, max_bins: int = 512):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value <= 1e-9:
+            self.zero_count += 1
+            return
+
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        keys = sorted(self.bins)
+        lowest_count = self.bins.pop(keys[0])
+        self.bins[keys[1]] += lowest_count
+
+    def merge(self, other: "DDSketch") -> None:
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                return 2 * self.gamma**key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "bins": self.bins,
+            "zero_count": self.zero_count,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"], data["max_bins"])
+        sketch.bins = {int(key): count for key, count in data["bins"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        return sketch
+
+
+class EndpointLatency:
+    """Latency of one endpoint over the current and the previous window.
+
+    Quantiles cover between one and two LATENCY_WINDOW of samples, so they
+    follow the recent behavior of the endpoint while memory stays at two
+    sketches.
+    """
+
+    def __init__(self):
+        self.window_started = clock.now()
+        self.current = DDSketch()
+        self.previous = DDSketch()
+
+    def rotate(self) -> None:
+        now = clock.now()
+        if now - self.window_started >= config.LATENCY_WINDOW:
+            stale = now - self.window_started >= 2 * config.LATENCY_WINDOW
+            self.previous = DDSketch() if stale else self.current
+            self.current = DDSketch()
+            self.window_started = now
+
+    def add(self, seconds: float) -> None:
+        self.rotate()
+        self.current.add(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        self.rotate()
+        merged = DDSketch()
+        merged.merge(self.previous)
+        merged.merge(self.current)
+        if merged.count < config.LATENCY_MIN_SAMPLES:
+            return None
+        return merged.quantile(q)
+
+    def to_dict(self) -> dict:
+        return {
+            "window_started": self.window_started,
+            "current": self.current.to_dict(),
+            "previous": self.previous.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EndpointLatency":
+        latency = cls()
+        latency.window_started = data["window_started"]
+        latency.current = DDSketch.from_dict(data["current"])
+        latency.previous = DDSketch.from_dict(data["previous"])
+        return latency
+
+
+class LatencyTracker:
+    """Latency sketches of all probed endpoints, snapshotted to Redis."""
+
+    KEY = "latency_sketches"
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.endpoints: dict[str, EndpointLatency] = {}
+        self.loaded = False
+
+    def observe(self, url: str, seconds: float) -> None:
+        self.endpoints.setdefault(url, EndpointLatency()).add(seconds)
+
+    def quantile(self, url: str, q: float) -> Optional[float]:
+        latency = self.endpoints.get(url)
+        return latency.quantile(q) if latency else None
+
+    def forget(self, urls: list[str]) -> None:
+        for url in urls:
+            self.endpoints.pop(url, None)
+        if urls:
+            self.redis_client.hdel(self.KEY, *urls)
+
+    def save(self) -> None:
+        if not self.loaded:
+            # Saving before the snapshot is loaded would overwrite it.
+            self.load()
+            if not self.loaded:
+                return
+        if not self.endpoints:
+            return
+
+        try:
+            self.redis_client.hset(
+                self.KEY,
+                mapping={
+                    url: json.dumps(latency.to_dict())
+                    for url, latency in self.endpoints.items()
+                },
+            )
+        except Exception as e:
+            logging.error(f"Failed to save latency sketches: {e}")
+
+    def load(self) -> None:
+        try:
+            sketches_data = self.redis_client.hgetall(self.KEY)
+        except Exception as e:
+            logging.error(f"Failed to load latency sketches: {e}")
+            return
+
+        self.loaded = True
+        for url, data in sketches_data.items():
+            try:
+                latency = EndpointLatency.from_dict(json.loads(data))
+            except (ValueError, KeyError) as e:
+                logging.error(f"Error parsing latency sketch of {url}: {e}")
+                continue
+            # Samples observed before the load are newer; keep them.
+            self.endpoints.setdefault(url, latency)
@@ -1,5 +1,7 @@
 import hashlib
 import logging
+import os
+import signal
 import time
 from datetime import datetime
 from threading import Thread
@@ -8,10 +10,27 @@ from typing import Any, Optional
 import config
 import redis
 import requests
-import xmltodict
-from messages import ISSUE_MESSAGES
-
+from balance_forecast import BalanceForecaster
+from consensus_scanner import ConsensusScanner
+from flap_damping import FlapDamper
+from latency_sketch import LatencyTracker
+from network_analysis import NetworkAnalysis, analyze_network
+from node_discovery import NodeTargets
+from probe_log import ProbeRecorder
+from probe_quorum import ProbeQuorum
+from rpc_client import HedgedRpc
+
+from shared import clock
+from shared.chain_head_store import ChainHead, ChainHeadStore
+from shared.heartbeat import HeartbeatReporter
+from shared.history_store import HistoryStore
+from shared.issue_spool import IssueSpool
 from shared.issue_store import IssueStore
+from shared.issue_templates import render_issue_message
+from shared.node_state_store import NodeStateStore
+from shared.startup import StartupTimer
+
+startup_timer = StartupTimer()
 
 # Configure logging
 logging.basicConfig(
@@ -22,7 +41,36 @@ logging.basicConfig(
 redis_client = redis.Redis(
     host=config.REDIS_HOST, port=config.REDIS_PORT, decode_responses=True
 )
-issue_store = IssueStore(redis_client)
+issue_store = IssueStore(
+    redis_client,
+    (
+        IssueSpool(config.ISSUE_SPOOL_PATH, config.ISSUE_SPOOL_FSYNC_INTERVAL)
+        if config.ISSUE_SPOOL_PATH
+        else None
+    ),
+    config.ISSUE_SPOOL_RETRY_INTERVAL,
+)
+chain_head_store = ChainHeadStore(redis_client)
+history_store = HistoryStore(redis_client, config.HISTORY_MAX_EVENTS)
+node_state_store = NodeStateStore(redis_client)
+latency_tracker = LatencyTracker(redis_client)
+balance_forecaster = BalanceForecaster(redis_client)
+probe_quorum = ProbeQuorum(redis_client, config.PROBE_AGENT_NAME)
+heartbeat = HeartbeatReporter(redis_client, "monitor_service")
+flap_damper = FlapDamper(
+    config.FLAP_OPEN_SAMPLES,
+    config.FLAP_WINDOW,
+    config.FLAP_RESOLVE_SAMPLES,
+    config.FLAP_SCORE_WINDOW,
+)
+reported_flap_scores: dict[str, int] = {}
+probe_recorder = ProbeRecorder(config.PROBE_LOG_DIR) if config.PROBE_LOG_DIR else None
+
+
+def record_probe(kind: str, **data) -> None:
+    """Record a raw probe result when probe recording is enabled."""
+    if probe_recorder is not None:
+        probe_recorder.record(kind, **data)
 
 
 def generate_group_id(group_name: str) -> str:
@@ -37,7 +85,7 @@ def node_group(node_url: str) -> tuple[str, str, str]:
 
 def insert_new_issue(
     issue_id: str,
-    message: str,
+    fields: dict,
     group_id: str,
     group_type: str,
     group_name: str,
@@ -47,12 +95,16 @@ def insert_new_issue(
     """Insert or update an issue in Redis."""
     issue_store.insert_new_issue(
         issue_id,
-        message,
+        render_issue_message(issue_type, fields),
         group_id,
         group_type,
         group_name,
         issue_type,
         severity,
+        fields,
+    )
+    history_store.record_issue_event(
+        "opened", issue_id, group_id, group_name, issue_type, severity
     )
 
 
@@ -61,14 +113,52 @@ def is_issue_exists(issue_id: str) -> bool:
     return issue_store.issue_exists(issue_id)
 
 
-def mark_issue_resolved(issue_id: str, message: str) -> None:
+def mark_issue_resolved(
+    issue_id: str, issue_type: str, fields: Optional[dict] = None
+) -> None:
     """Mark an issue as resolved in Redis."""
-    issue_store.mark_issue_resolved(issue_id, message)
+    issue = issue_store.get_issue(issue_id)
+    if issue is not None and issue.resolved:
+        # Resolving again would keep pushing back its expiry.
+        return
+
+    resolved = issue_store.mark_issue_resolved(
+        issue_id,
+        render_issue_message(issue_type, fields or {}, resolved=True),
+        config.RESOLVED_ISSUE_TTL,
+    )
+    # Only the change from open to resolved is an event.
+    if resolved and issue is not None:
+        history_store.record_issue_event(
+            "resolved",
+            issue_id,
+            issue.group_id,
+            issue.group_name,
+            issue_type,
+            issue.severity,
+            duration=int(clock.now()) - issue.started_at,
+        )
 
 
-def update_health_status() -> None:
-    """Update last check timestamp in Redis."""
-    redis_client.set("health:monitor_service", int(time.time()))
+def damp_issue_state(
+    issue_id: str, failing: bool, issue_exists: bool
+) -> tuple[bool, bool]:
+    """Record a check result and decide whether to open or resolve the issue."""
+    flap_damper.record(issue_id, failing)
+    if not issue_exists:
+        reported_flap_scores.pop(issue_id, None)
+        if flap_damper.is_passing(issue_id):
+            # Only checks that failed recently need their samples.
+            flap_damper.forget(issue_id)
+            return False, False
+        # An issue opened on a passing sample would be wrong when it is sent.
+        return failing and flap_damper.should_open(issue_id), False
+
+    flap_score = flap_damper.flap_score(issue_id)
+    if reported_flap_scores.get(issue_id) != flap_score:
+        issue_store.update_flap_score(issue_id, flap_score)
+        reported_flap_scores[issue_id] = flap_score
+    return False, flap_damper.should_resolve(issue_id)
 
 
 def generate_issue_id(part1: str, part2: str) -> str:
@@ -77,6 +167,14 @@ def generate_issue_id(part1: str, part2: str) -> str:
     return hashlib.sha256(message).hexdigest()
 
 
+def parse_rpc_result(url: str, response: requests.Response) -> Optional[Any]:
+    try:
+        return response.json().get("result")
+    except ValueError:
+        logging.error(f"Invalid JSON response from {url}: {response.text}")
+        return None
+
+
 def send_rpc_request(method: str, params: list[Any]) -> Optional[Any]:
     """Send an RPC request to IDChain."""
     request_data = {
@@ -85,21 +183,33 @@ def send_rpc_request(method: str, params: list[Any]) -> Optional[Any]:
         "params": params,
         "id": 1,
     }
-    headers = {"Content-Type": "application/json", "Cache-Control": "no-cache"}
-    response = send_post_request(config.IDCHAIN_RPC_URL, request_data, headers)
-    if response:
+    return idchain_rpc.call(request_data, parse_rpc_result)
+
+
+def send_rpc_batch(calls: list[tuple[str, list[Any]]]) -> Optional[list[Any]]:
+    """Send several RPC requests to IDChain in one HTTP request.
+
+    Returns the results in the order of the calls, or None if any failed.
+    """
+    request_data = [
+        {"jsonrpc": "2.0", "method": method, "params": params, "id": index}
+        for index, (method, params) in enumerate(calls)
+    ]
+
+    def parse_results(url: str, response: requests.Response) -> Optional[list[Any]]:
         try:
-            return response.json().get("result")
-        except ValueError:
-            logging.error(
-                f"Invalid JSON response from {config.IDCHAIN_RPC_URL}: {response.text}"
-            )
-    return None
+            results = {item["id"]: item.get("result") for item in response.json()}
+            return [results[index] for index in range(len(calls))]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logging.error(f"Invalid batch response from {url}: {response.text}")
+            return None
+
+    return idchain_rpc.call(request_data, parse_results)
 
 
 def send_post_request(
     url: str,
-    request_data: Optional[dict[str, Any]] = None,
+    request_data: Optional[Any] = None,
     headers: Optional[dict[str, str]] = None,
 ) -> Optional[requests.Response]:
     """Send an HTTP POST request with retries."""
@@ -112,11 +222,19 @@ def send_post_request(
                 timeout=config.HTTP_TIMEOUT,
             )
             response.raise_for_status()
+            record_probe(
+                "post",
+                url=url,
+                payload=request_data,
+                status=response.status_code,
+                body=response.text,
+            )
             return response
         except requests.exceptions.RequestException as e:
             logging.warning(f"POST request to {url} failed: {e}")
             time.sleep(2 * attempt)
     logging.error(f"POST request to {url} failed after {config.MAX_RETRIES} attempts.")
+    record_probe("post", url=url, payload=request_data, status=None, body=None)
     return None
 
 
@@ -135,36 +253,178 @@ def send_get_request(
                 timeout=config.HTTP_TIMEOUT,
             )
             response.raise_for_status()
+            latency_tracker.observe(url, response.elapsed.total_seconds())
+            record_probe(
+                "get",
+                url=url,
+                payload=params,
+                status=response.status_code,
+                body=response.text,
+            )
             return response
         except requests.exceptions.RequestException as e:
+            if isinstance(e, requests.exceptions.ReadTimeout):
+                # The endpoint accepted the request but did not answer in time.
+                latency_tracker.observe(url, config.HTTP_READ_TIMEOUT)
             logging.warning(f"GET request to {url} failed: {e}")
             time.sleep(2 * attempt)
     logging.error(f"GET request to {url} failed after {config.MAX_RETRIES} attempts.")
+    record_probe("get", url=url, payload=params, status=None, body=None)
     return None
 
 
+def get_json(url: str) -> Optional[Any]:
+    """Fetch a JSON document."""
+    response = send_get_request(url)
+    if not response:
+        return None
+
+    try:
+        return response.json()
+    except ValueError:
+        logging.error(f"Invalid JSON response from {url}")
+        return None
+
+
+node_targets = NodeTargets(redis_client, get_json)
+# Looked up on every call, so tools/replay.py can replace send_post_request.
+idchain_rpc = HedgedRpc(config.IDCHAIN_RPC_URLS, lambda *args: send_post_request(*args))
+consensus_scanner = ConsensusScanner(redis_client, send_rpc_batch)
+
+
 def get_eidi_balance(addr: str) -> Optional[float]:
     """Get the Eidi balance of an Ethereum address."""
     balance = send_rpc_request(method="eth_getBalance", params=[addr, "latest"])
     return int(balance, 16) / 10**18 if balance else None
 
 
-def get_idchain_block_number() -> Optional[int]:
-    """Get IDChain block number."""
-    block_number_hex = send_rpc_request(
-        method="eth_blockNumber",
-        params=[],
-    )
-    return int(block_number_hex, 16) if block_number_hex else None
+def block_number_of(block: Any) -> Optional[int]:
+    try:
+        return int(block["number"], 16)
+    except (KeyError, TypeError, ValueError):
+        return None
 
 
-def get_transaction_count(address: str) -> Optional[int]:
-    """Get IDChain block number."""
-    transaction_count = send_rpc_request(
-        method="eth_getTransactionCount",
-        params=[address, "pending"],
-    )
-    return int(transaction_count, 16) if transaction_count else None
+def get_idchain_head() -> Optional[ChainHead]:
+    """Get the latest IDChain block number and block time.
+
+    The head is asked from every endpoint, which keeps their block heights
+    current for ranking, and the highest one is used.
+    """
+    request_data = {
+        "jsonrpc": "2.0",
+        "method": "eth_getBlockByNumber",
+        "params": ["latest", False],
+        "id": 1,
+    }
+    block = idchain_rpc.call_all(request_data, parse_rpc_result, block_number_of)
+    if not block:
+        return None
+
+    try:
+        return ChainHead(
+            block_number=int(block["number"], 16),
+            block_time=int(block["timestamp"], 16),
+            updated_at=int(clock.now()),
+        )
+    except (KeyError, TypeError, ValueError):
+        logging.error(f"Invalid latest IDChain block: {block}")
+        return None
+
+
+class ChainHeadTracker:
+    """Keep the latest IDChain head in memory and in Redis."""
+
+    def __init__(self):
+        self._head: Optional[ChainHead] = None
+
+    def start(self) -> None:
+        """Fetch the head once, then keep polling it in the background.
+
+        Until a poll succeeds, the head saved before a restart is used for as
+        long as it is fresh.
+        """
+        try:
+            self._head = chain_head_store.get_head()
+        except Exception as e:
+            logging.error(f"Failed to load the saved chain head: {e}")
+        self.poll()
+        Thread(target=self.run, daemon=True).start()
+
+    def run(self) -> None:
+        while True:
+            time.sleep(config.CHAIN_HEAD_POLL_INTERVAL)
+            self.poll()
+
+    def poll(self) -> None:
+        try:
+            head = get_idchain_head()
+            if head is None:
+                return
+
+            self._head = head
+            chain_head_store.save_head(head)
+        except Exception as e:
+            logging.error(f"Error in chain head tracker: {e}")
+
+    def latest(self) -> Optional[ChainHead]:
+        """Return the cached head, or None if it is older than the freshness bound."""
+        head = self._head
+        if head is None:
+            return None
+
+        if not head.is_fresh(config.CHAIN_HEAD_MAX_AGE):
+            logging.warning(
+                f"IDChain head is stale: block {head.block_number} was fetched "
+                f"{head.age()} seconds ago."
+            )
+            return None
+        return head
+
+
+chain_head_tracker = ChainHeadTracker()
+
+
+def check_latency(
+    url: str,
+    issue_type: str,
+    fields: dict,
+    group: tuple[str, str, str],
+) -> None:
+    """Check the recent p95 latency of an endpoint and manage issue tracking."""
+    p95 = latency_tracker.quantile(url, 0.95)
+    if p95 is None:
+        return
+
+    issue_id = generate_issue_id(url, "latency")
+    issue_exists = is_issue_exists(issue_id)
+    is_slow = p95 > config.LATENCY_P95_BORDER
+    open_issue, resolve_issue = damp_issue_state(issue_id, is_slow, issue_exists)
+    if open_issue:
+        insert_new_issue(
+            issue_id,
+            {**fields, "p95": p95, "border": config.LATENCY_P95_BORDER},
+            *group,
+            issue_type,
+        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, issue_type, fields)
+
+
+def parse_node_state(
+    url: str, response: Optional[requests.Response]
+) -> Optional[dict]:
+    """Extract the node state from the response of a node state request."""
+    if not response:
+        return None
+
+    try:
+        return response.json()["data"]
+    except ValueError:
+        logging.error(f"Invalid JSON response from {url}")
+    except (KeyError, TypeError):
+        logging.error(f"Missing node state data in response from {url}")
+    return None
 
 
 def get_node_state(node_info: dict) -> Optional[dict]:
@@ -172,32 +432,61 @@ def get_node_state(node_info: dict) -> Optional[dict]:
     issue_id = generate_issue_id(node_info["url"], "node state")
     issue_exists = is_issue_exists(issue_id)
     response = send_get_request(node_info["url"])
-    node_state = None
-    if response:
-        try:
-            node_state = response.json()["data"]
-        except ValueError:
-            logging.error(f"Invalid JSON response from {node_info['url']}")
-        except (KeyError, TypeError):
-            logging.error(
-                f"Missing node state data in response from {node_info['url']}"
-            )
-
-    if not node_state and not issue_exists:
+    node_state = parse_node_state(node_info["url"], response)
+    probe_quorum.record_local(node_info["url"], bool(node_state))
+    is_down = probe_quorum.is_down(node_info["url"])
+    open_issue, resolve_issue = damp_issue_state(issue_id, is_down, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["node_state_down"].format(node_info["url"]),
+            {"node": node_info["url"]},
             *node_group(node_info["url"]),
             "node_state",
             "critical",
         )
-    elif node_state and issue_exists:
-        mark_issue_resolved(
-            issue_id, ISSUE_MESSAGES["node_state_resolved"].format(node_info["url"])
-        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "node_state", {"node": node_info["url"]})
+
+    check_latency(
+        node_info["url"],
+        "node_state_latency_degraded",
+        {"node": node_info["url"]},
+        node_group(node_info["url"]),
+    )
     return node_state
 
 
+def check_balance_forecast(
+    key: str,
+    balance: float,
+    low_balance: bool,
+    issue_type: str,
+    fields: dict,
+    group: tuple[str, str, str],
+) -> None:
+    """Warn when a balance is forecast to run out within BALANCE_EMPTY_HORIZON."""
+    time_to_empty = balance_forecaster.observe(key, balance)
+    issue_id = generate_issue_id(key, "balance forecast")
+    issue_exists = is_issue_exists(issue_id)
+    # Once the balance is low, the low balance issue takes over.
+    running_out = (
+        not low_balance
+        and time_to_empty is not None
+        and time_to_empty < config.BALANCE_EMPTY_HORIZON
+    )
+    open_issue, resolve_issue = damp_issue_state(issue_id, running_out, issue_exists)
+    # Without a forecast there is no time to empty to report yet.
+    if open_issue and time_to_empty is not None:
+        insert_new_issue(
+            issue_id,
+            {**fields, "balance": balance, "hours": time_to_empty / 3600},
+            *group,
+            issue_type,
+        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, issue_type, fields)
+
+
 def check_consensus_sender_balance(node_url: str, consensus_sender: str) -> None:
     """Check the Eidi balance of the consensus sender and manage issue tracking."""
     issue_id = generate_issue_id(node_url, "consensus sender eidi balance")
@@ -208,19 +497,25 @@ def check_consensus_sender_balance(node_url: str, consensus_sender: str) -> None
         return
 
     low_balance = balance < config.BALANCE_BORDER
-    if low_balance and not issue_exists:
+    open_issue, resolve_issue = damp_issue_state(issue_id, low_balance, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["node_balance_low"].format(
-                node_url, balance, config.BALANCE_BORDER
-            ),
+            {"node": node_url, "balance": balance, "threshold": config.BALANCE_BORDER},
             *node_group(node_url),
             "node_balance",
         )
-    elif issue_exists and not low_balance:
-        mark_issue_resolved(
-            issue_id, ISSUE_MESSAGES["node_balance_resolved"].format(node_url)
-        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "node_balance", {"node": node_url})
+
+    check_balance_forecast(
+        consensus_sender.lower(),
+        balance,
+        low_balance,
+        "node_balance_forecast",
+        {"node": node_url},
+        node_group(node_url),
+    )
 
 
 def check_consensus_receiver(
@@ -230,17 +525,16 @@ def check_consensus_receiver(
     issue_id = generate_issue_id(node_url, "consensus receiver service")
     issue_exists = is_issue_exists(issue_id)
     is_active = block_number - last_processed_block < config.RECEIVER_BORDER
-    if not is_active and not issue_exists:
+    open_issue, resolve_issue = damp_issue_state(issue_id, not is_active, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["receiver_service_down"].format(node_url),
+            {"node": node_url},
             *node_group(node_url),
             "receiver",
         )
-    elif is_active and issue_exists:
-        mark_issue_resolved(
-            issue_id, ISSUE_MESSAGES["receiver_service_resolved"].format(node_url)
-        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "receiver", {"node": node_url})
 
 
 def check_scorer(node_url: str, verifications_block: int, block_number: int) -> None:
@@ -251,70 +545,85 @@ def check_scorer(node_url: str, verifications_block: int, block_number: int) ->
         block_number - verifications_block
         < config.SNAPSHOT_PERIOD + config.SCORER_BORDER
     )
-    if not is_active and not issue_exists:
+    open_issue, resolve_issue = damp_issue_state(issue_id, not is_active, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["scorer_service_down"].format(node_url),
+            {"node": node_url},
             *node_group(node_url),
             "scorer",
         )
-    elif is_active and issue_exists:
-        mark_issue_resolved(
-            issue_id, ISSUE_MESSAGES["scorer_service_resolved"].format(node_url)
-        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "scorer", {"node": node_url})
 
 
 def check_consensus_sender(node_eth_signer: str, states: dict) -> None:
-    """Check if the consensus sender service is active and manage issue tracking."""
-
-    if len(states[node_eth_signer]) < 5:
+    """Check if the consensus sender service is active and manage issue tracking.
+
+    The sender is down if the node initiated an operation that already shows
+    in a sample at least CONSENSUS_SENDER_GRACE_BLOCKS old, and its sender
+    address has sent no transaction since the sample before that operation.
+    """
+    node_states = states[node_eth_signer]
+    node_state = node_states[-1]
+    baseline = next(
+        (
+            state
+            for state in reversed(node_states)
+            if state["stateBlock"]
+            <= node_state["stateBlock"] - config.CONSENSUS_SENDER_GRACE_BLOCKS
+        ),
+        None,
+    )
+    if baseline is None:
         return
 
-    node_state = states[node_eth_signer][-1]
-    issue_id = generate_issue_id(node_state["url"], "consensus sender service")
-    issue_exists = is_issue_exists(issue_id)
-    initiated_operations = [
-        state["initOp"]
-        for state in states[node_eth_signer]
-        if state["initOp"] is not None
-    ]
-    sender_transactions_counters = [
-        state["senderTransactionCount"]
-        for state in states[node_eth_signer]
-        if state["senderTransactionCount"] is not None
-    ]
-    if len(initiated_operations) < 2:
+    if node_state["initOp"] is None or baseline["initOp"] is None:
         logging.warning(
             f"Initiated operations count unavailable. {node_state['url']} not checked."
         )
         return
 
-    if len(sender_transactions_counters) < 2:
+    # The last sample before the operations counted by the baseline.
+    before = next(
+        (
+            state
+            for state in reversed(node_states)
+            if state["stateBlock"] < baseline["stateBlock"]
+            and state["initOp"] is not None
+            and state["initOp"] < baseline["initOp"]
+        ),
+        None,
+    )
+    from_block = (before or node_states[0])["stateBlock"]
+    if not consensus_scanner.covers(from_block, node_state["stateBlock"]):
         logging.warning(
-            f"Sender transaction count unavailable. {node_state['url']} not checked."
+            f"Consensus transactions not scanned yet. {node_state['url']} not checked."
         )
         return
 
-    initiated_operations_increased = initiated_operations[-1] > initiated_operations[0]
-    sender_transactions_count_increased = (
-        sender_transactions_counters[-1] > sender_transactions_counters[0]
-    )
-
-    service_down = (
-        initiated_operations_increased and not sender_transactions_count_increased
+    issue_id = generate_issue_id(node_state["url"], "consensus sender service")
+    issue_exists = is_issue_exists(issue_id)
+    last_sent_block = consensus_scanner.last_sent_block(
+        node_state["consensusSenderAddress"]
     )
-    if service_down and not issue_exists:
+    sent_since = last_sent_block is not None and last_sent_block > from_block
+    if before is not None:
+        service_down = not sent_since
+    else:
+        # The unsent operations, if any, are older than the kept samples; an
+        # open issue stays open until the sender sends again.
+        service_down = issue_exists and not sent_since
+    open_issue, resolve_issue = damp_issue_state(issue_id, service_down, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["sender_service_down"].format(node_state["url"]),
+            {"node": node_state["url"]},
             *node_group(node_state["url"]),
             "sender",
         )
-    elif not service_down and issue_exists:
-        mark_issue_resolved(
-            issue_id,
-            ISSUE_MESSAGES["sender_service_resolved"].format(node_state["url"]),
-        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "sender", {"node": node_state["url"]})
 
 
 def check_profile_service(node_url: str, profile_service_url: str) -> None:
@@ -323,38 +632,50 @@ def check_profile_service(node_url: str, profile_service_url: str) -> None:
     issue_exists = is_issue_exists(issue_id)
     response = send_get_request(profile_service_url)
     succeeded = response is not None and response.status_code == 200
-    if not succeeded and not issue_exists:
+    probe_quorum.record_local(profile_service_url, succeeded)
+    is_down = probe_quorum.is_down(profile_service_url)
+    open_issue, resolve_issue = damp_issue_state(issue_id, is_down, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["profile_service_down"].format(profile_service_url),
+            {"profile_service": profile_service_url},
             *node_group(node_url),
             "profile",
         )
-    elif succeeded and issue_exists:
+    elif resolve_issue:
         mark_issue_resolved(
-            issue_id,
-            ISSUE_MESSAGES["profile_service_resolved"].format(profile_service_url),
+            issue_id, "profile", {"profile_service": profile_service_url}
         )
 
+    check_latency(
+        profile_service_url,
+        "profile_latency_degraded",
+        {"profile_service": profile_service_url},
+        node_group(node_url),
+    )
+
 
 def check_node_version(last_version: str, node_state: dict) -> None:
     """Check if the node is running the latest version and manage issue tracking.."""
     issue_id = generate_issue_id(node_state["url"], "node version")
     issue_exists = is_issue_exists(issue_id)
     is_version_latest = node_state["version"] == last_version
-    if not is_version_latest and not issue_exists:
+    open_issue, resolve_issue = damp_issue_state(
+        issue_id, not is_version_latest, issue_exists
+    )
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["node_version_outdated"].format(
-                node_state["url"], node_state["version"], last_version
-            ),
+            {
+                "node": node_state["url"],
+                "version": node_state["version"],
+                "last_version": last_version,
+            },
             *node_group(node_state["url"]),
             "node_version",
         )
-    elif is_version_latest and issue_exists:
-        mark_issue_resolved(
-            issue_id, ISSUE_MESSAGES["node_version_resolved"].format(node_state["url"])
-        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "node_version", {"node": node_state["url"]})
 
 
 def check_apps_updater(
@@ -364,17 +685,16 @@ def check_apps_updater(
     issue_id = generate_issue_id(node_url, "apps updater service")
     issue_exists = is_issue_exists(issue_id)
     is_active = block_number - apps_last_update_block < config.APPS_UPDATE_BORDER
-    if not is_active and not issue_exists:
+    open_issue, resolve_issue = damp_issue_state(issue_id, not is_active, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["apps_updater_down"].format(node_url),
+            {"node": node_url},
             *node_group(node_url),
             "apps_updater",
         )
-    elif is_active and issue_exists:
-        mark_issue_resolved(
-            issue_id, ISSUE_MESSAGES["apps_updater_resolved"].format(node_url)
-        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "apps_updater", {"node": node_url})
 
 
 def check_sp_updater(
@@ -384,17 +704,16 @@ def check_sp_updater(
     issue_id = generate_issue_id(node_url, "sp updater service")
     issue_exists = is_issue_exists(issue_id)
     is_active = block_number - sp_last_update_block < config.SPONSORSHIPS_UPDATE_BORDER
-    if not is_active and not issue_exists:
+    open_issue, resolve_issue = damp_issue_state(issue_id, not is_active, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["sp_updater_down"].format(node_url),
+            {"node": node_url},
             *node_group(node_url),
             "sponsorships_updater",
         )
-    elif is_active and issue_exists:
-        mark_issue_resolved(
-            issue_id, ISSUE_MESSAGES["sp_updater_resolved"].format(node_url)
-        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "sponsorships_updater", {"node": node_url})
 
 
 def check_seed_groups_updater(
@@ -406,29 +725,55 @@ def check_seed_groups_updater(
     is_active = (
         block_number - seed_groups_last_update_block < config.SEED_GROUPS_UPDATE_BORDER
     )
-    if not is_active and not issue_exists:
+    open_issue, resolve_issue = damp_issue_state(issue_id, not is_active, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["seed_groups_updater_down"].format(node_url),
+            {"node": node_url},
             *node_group(node_url),
             "seed_groups_updater",
         )
-    elif is_active and issue_exists:
-        mark_issue_resolved(
-            issue_id, ISSUE_MESSAGES["seed_groups_updater_resolved"].format(node_url)
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "seed_groups_updater", {"node": node_url})
+
+
+def check_node_one_state(active_nodes: list) -> None:
+    """Check if node one, the reference for the latest version, is reporting."""
+    issue_id = generate_issue_id(config.NODE_ONE_URL, "node one state")
+    issue_exists = is_issue_exists(issue_id)
+    is_down = config.NODE_ONE_ETH_SIGNER not in active_nodes
+    open_issue, resolve_issue = damp_issue_state(issue_id, is_down, issue_exists)
+    if open_issue:
+        insert_new_issue(
+            issue_id,
+            {},
+            "system",
+            "system",
+            "System",
+            "node_one_state",
+            "critical",
         )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "node_one_state")
 
 
 def check_all_nodes_services(states: dict, active_nodes: list) -> None:
     """Perform health checks for all active nodes in the network."""
+    if active_nodes:
+        check_node_one_state(active_nodes)
+
     try:
         last_version = states[config.NODE_ONE_ETH_SIGNER][-1]["version"]
     except (KeyError, IndexError, TypeError):
         last_version = None
 
-    for node_eth_signer, node_states in states.items():
-        if node_eth_signer not in active_nodes:
-            continue
+    active_states = [
+        (node_eth_signer, node_states)
+        for node_eth_signer, node_states in states.items()
+        if node_eth_signer in active_nodes
+    ]
+    for index, (node_eth_signer, node_states) in enumerate(active_states):
+        heartbeat.stage("check_nodes", backlog=len(active_states) - index)
 
         node_state = node_states[-1]
         check_consensus_sender(node_eth_signer, states)
@@ -465,24 +810,86 @@ def check_all_nodes_services(states: dict, active_nodes: list) -> None:
             check_node_version(last_version, node_state)
 
 
+def check_peer_divergence(node_url: str, services: list[str]) -> None:
+    """Check if a node lags far behind its peers and manage issue tracking."""
+    issue_id = generate_issue_id(node_url, "peer divergence")
+    issue_exists = is_issue_exists(issue_id)
+    is_divergent = bool(services)
+    open_issue, resolve_issue = damp_issue_state(issue_id, is_divergent, issue_exists)
+    if open_issue:
+        insert_new_issue(
+            issue_id,
+            {"node": node_url, "services": ", ".join(services)},
+            *node_group(node_url),
+            "peer_divergence",
+        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "peer_divergence", {"node": node_url})
+
+
+def check_network_stall(analysis: NetworkAnalysis) -> None:
+    """Check if most node receivers stopped at once and manage issue tracking."""
+    issue_id = generate_issue_id(config.NODE_ONE_URL, "network stall")
+    issue_exists = is_issue_exists(issue_id)
+    is_stalled = analysis.network_stalled
+    open_issue, resolve_issue = damp_issue_state(issue_id, is_stalled, issue_exists)
+    if open_issue:
+        insert_new_issue(
+            issue_id,
+            {
+                "stalled": len(analysis.stalled_nodes),
+                "total": len(analysis.node_urls),
+            },
+            "system",
+            "system",
+            "System",
+            "network_stall",
+            "critical",
+        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "network_stall")
+
+
+def check_network_anomalies(states: dict, active_nodes: list) -> None:
+    """Compare all active nodes with each other to find outliers and stalls."""
+    analysis = analyze_network(states, active_nodes)
+    if not analysis.node_urls:
+        return
+
+    logging.info(f"Median block lags across nodes: {analysis.medians}")
+    for node_url in analysis.node_urls:
+        check_peer_divergence(node_url, analysis.divergent_nodes.get(node_url, []))
+    check_network_stall(analysis)
+
+
 def check_recovery_service() -> None:
     """Check the recovery service and handle issue tracking."""
     issue_id = generate_issue_id(config.NODE_ONE_URL, "recovery service")
     issue_exists = is_issue_exists(issue_id)
     response = send_get_request(config.RECOVERY_SERVICE_URL)
     succeeded = response is not None and response.status_code == 200
-    if not succeeded and not issue_exists:
+    probe_quorum.record_local(config.RECOVERY_SERVICE_URL, succeeded)
+    is_down = probe_quorum.is_down(config.RECOVERY_SERVICE_URL)
+    open_issue, resolve_issue = damp_issue_state(issue_id, is_down, issue_exists)
+    if open_issue:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["recovery_service_down"],
+            {},
             "system",
             "system",
             "System",
             "recovery_service",
             "critical",
         )
-    elif succeeded and issue_exists:
-        mark_issue_resolved(issue_id, ISSUE_MESSAGES["recovery_service_resolved"])
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "recovery_service")
+
+    check_latency(
+        config.RECOVERY_SERVICE_URL,
+        "recovery_latency_degraded",
+        {},
+        ("system", "system", "System"),
+    )
 
 
 def check_backup_service() -> None:
@@ -497,6 +904,9 @@ def check_backup_service() -> None:
 
     else:
         try:
+            # Only needed every few cycles, so keep it out of the startup path.
+            import xmltodict
+
             data = xmltodict.parse(response.text)
             backups = data.get("ListBucketResult", {}).get("Contents", [])
             backup_timestamps = [
@@ -508,7 +918,7 @@ def check_backup_service() -> None:
             ]
             if backup_timestamps:
                 last_backup = max(backup_timestamps)
-                is_active = (time.time() - last_backup) < config.BACKUP_BORDER
+                is_active = (clock.now() - last_backup) < config.BACKUP_BORDER
             else:
                 logging.warning("No valid backup files found in backup service.")
         except Exception as e:
@@ -517,7 +927,7 @@ def check_backup_service() -> None:
     if not is_active and not issue_exists:
         insert_new_issue(
             issue_id,
-            ISSUE_MESSAGES["backup_service_down"],
+            {},
             "system",
             "system",
             "System",
@@ -525,7 +935,7 @@ def check_backup_service() -> None:
             "critical",
         )
     elif is_active and issue_exists:
-        mark_issue_resolved(issue_id, ISSUE_MESSAGES["backup_service_resolved"])
+        mark_issue_resolved(issue_id, "backup_service")
 
 
 def check_apps_sp_balance() -> None:
@@ -552,37 +962,63 @@ def check_apps_sp_balance() -> None:
         if low_balance and not issue_exists:
             insert_new_issue(
                 issue_id,
-                ISSUE_MESSAGES["app_sp_balance_low"].format(
-                    app["id"], app["unusedSponsorships"]
-                ),
+                {"app": app["id"], "balance": app["unusedSponsorships"]},
                 "apps",
                 "apps",
                 "Apps",
                 "app_sp_balance",
             )
         elif issue_exists and not low_balance:
-            mark_issue_resolved(
-                issue_id, ISSUE_MESSAGES["app_sp_balance_resolved"].format(app["id"])
-            )
+            mark_issue_resolved(issue_id, "app_sp_balance", {"app": app["id"]})
+
+        check_balance_forecast(
+            f"app:{app['id']}",
+            app["unusedSponsorships"],
+            low_balance,
+            "app_sp_balance_forecast",
+            {"app": app["id"]},
+            ("apps", "apps", "Apps"),
+        )
+
+
+def check_idchain_rpc(head: Optional[ChainHead]) -> None:
+    """Check if a fresh IDChain head is available and manage issue tracking."""
+    # Keyed by the first endpoint, so the id is the same as with a single one.
+    issue_id = generate_issue_id(config.IDCHAIN_RPC_URLS[0], "idchain rpc")
+    issue_exists = is_issue_exists(issue_id)
+    open_issue, resolve_issue = damp_issue_state(issue_id, head is None, issue_exists)
+    if open_issue:
+        insert_new_issue(
+            issue_id,
+            {"rpc_url": ", ".join(config.IDCHAIN_RPC_URLS)},
+            "system",
+            "system",
+            "System",
+            "idchain_rpc",
+            "critical",
+        )
+    elif resolve_issue:
+        mark_issue_resolved(issue_id, "idchain_rpc")
 
 
 def update_nodes_states(states: dict) -> tuple[dict, list]:
     """Fetch the nodes state and updates the states."""
     active_nodes = []
-    block_number = get_idchain_block_number()
-    if block_number is None:
-        logging.error("Failed to retrieve block number. Nodes service checks aborted.")
+    head = chain_head_tracker.latest()
+    check_idchain_rpc(head)
+    if head is None:
+        logging.error("No fresh IDChain head available. Nodes service checks aborted.")
         return states, []
 
-    for node_info in config.NODES_INFO:
+    for index, node_info in enumerate(node_targets):
+        heartbeat.stage("probe_nodes", backlog=len(node_targets) - index)
         node_state = get_node_state(node_info)
         if not node_state:
             continue
 
-        node_state["stateBlock"] = block_number
-        node_state["senderTransactionCount"] = get_transaction_count(
-            node_state["consensusSenderAddress"]
-        )
+        node_state["stateBlock"] = head.block_number
+        node_state["stateBlockTime"] = head.block_time
+        node_state["checkedAt"] = int(clock.now())
         node_state.update(node_info)
 
         key = node_state["ethSigningAddress"]
@@ -590,37 +1026,123 @@ def update_nodes_states(states: dict) -> tuple[dict, list]:
         states[key].append(node_state)
         states[key] = states[key][-5:]
         active_nodes.append(key)
+
+    try:
+        node_state_store.save_states({key: states[key][-1] for key in active_nodes})
+    except Exception as e:
+        logging.error(f"Failed to save node states: {e}")
     return states, active_nodes
 
 
+def forget_nodes(states: dict, node_urls: list[str]) -> None:
+    """Drop the state window and the issues of nodes that are no longer probed."""
+    signers = [
+        signer
+        for signer, node_states in states.items()
+        if node_states[-1]["url"] in node_urls
+    ]
+    probed_urls = node_urls + [
+        states[signer][-1]["profile_service_url"] for signer in signers
+    ]
+    latency_tracker.forget(probed_urls)
+    probe_quorum.forget(probed_urls)
+    balance_forecaster.forget(
+        [states[signer][-1]["consensusSenderAddress"].lower() for signer in signers]
+    )
+    for signer in signers:
+        del states[signer]
+    node_state_store.delete_states(signers)
+
+    for node_url in node_urls:
+        group_id, _, _ = node_group(node_url)
+        for issue in issue_store.fetch_group_issues(group_id):
+            issue_store.delete_issue(issue.id, issue.group_id)
+            flap_damper.forget(issue.id)
+            reported_flap_scores.pop(issue.id, None)
+
+
+def run_cycle(states: dict, counter: int) -> None:
+    """Run one round of checks, updating the node state windows in place."""
+    record_probe("cycle", counter=counter)
+
+    heartbeat.stage("node_targets")
+    _, removed_nodes = node_targets.refresh()
+    if removed_nodes:
+        forget_nodes(states, removed_nodes)
+
+    heartbeat.stage("probe_results")
+    probe_quorum.refresh()
+
+    states, active_nodes = update_nodes_states(states)
+
+    head = chain_head_tracker.latest()
+    if head is not None and active_nodes:
+        heartbeat.stage("consensus_scan")
+        try:
+            consensus_scanner.scan(
+                head.block_number,
+                [states[node][-1]["consensusSenderAddress"] for node in active_nodes],
+            )
+        except redis.exceptions.RedisError as e:
+            logging.error(f"Failed to save the consensus scan: {e}")
+
+    check_all_nodes_services(states, active_nodes)
+
+    heartbeat.stage("network_anomalies")
+    check_network_anomalies(states, active_nodes)
+
+    heartbeat.stage("recovery_service")
+    check_recovery_service()
+
+    if counter % 20 == 0:
+        heartbeat.stage("backup_service")
+        check_backup_service()
+
+    if counter % 40 == 0:
+        heartbeat.stage("apps_sp_balance")
+        check_apps_sp_balance()
+
+    latency_tracker.save()
+
+
 def main() -> None:
     """Continuously monitor the health of BrightID services."""
+    latency_tracker.load()
     states = {}
     counter = 0
     while True:
         counter += 1
+        heartbeat.start_cycle()
         try:
-            states, active_nodes = update_nodes_states(states)
-
-            check_all_nodes_services(states, active_nodes)
-
-            check_recovery_service()
-
-            if counter % 20 == 0:
-                check_backup_service()
-
+            run_cycle(states, counter)
+            issue_store.flush_spool()
             if counter % 40 == 0:
-                check_apps_sp_balance()
                 counter = 0
 
-            update_health_status()
+            heartbeat.finish_cycle()
+            startup_timer.finish("first cycle")
         except Exception as e:
             logging.error(f"Error in monitor_service: {e}")
+            heartbeat.record_error()
 
+        if probe_recorder is not None:
+            probe_recorder.flush()
         time.sleep(config.CHECK_INTERVAL)
 
 
+def shutdown(signum, frame) -> None:
+    """Close the probe log on docker stop; the monitor thread never returns."""
+    logging.info("Stopping Monitor Service...")
+    if probe_recorder is not None:
+        probe_recorder.close()
+    os._exit(0)
+
+
 if __name__ == "__main__":
     logging.info("Starting Monitor Service...")
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    chain_head_tracker.start()
+    startup_timer.mark("chain head")
     monitor_thread = Thread(target=main)
     monitor_thread.start()
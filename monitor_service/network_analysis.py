@@ -0,0 +1,107 @@
+import warnings
+from dataclasses import dataclass
+
+import config
+import numpy as np
+
+# Node state fields that hold the last block a node service has processed,
+# with the readable name and the border already used by the per-node checks.
+METRICS = (
+    ("lastProcessedBlock", "receiver", config.RECEIVER_BORDER),
+    ("verificationsBlock", "scorer", config.SNAPSHOT_PERIOD + config.SCORER_BORDER),
+    ("appsLastUpdateBlock", "apps updater", config.APPS_UPDATE_BORDER),
+    (
+        "sponsorshipsLastUpdateBlock",
+        "sponsorships updater",
+        config.SPONSORSHIPS_UPDATE_BORDER,
+    ),
+    (
+        "seedGroupsLastUpdateBlock",
+        "seed groups updater",
+        config.SEED_GROUPS_UPDATE_BORDER,
+    ),
+)
+METRIC_BORDERS = np.array([border for _, _, border in METRICS], dtype=float)
+RECEIVER_METRIC = 0
+
+
+@dataclass
+class NetworkAnalysis:
+    node_urls: list[str]
+    medians: dict[str, float]
+    divergent_nodes: dict[str, list[str]]
+    stalled_nodes: list[str]
+
+    @property
+    def network_stalled(self) -> bool:
+        return (
+            len(self.node_urls) >= 2
+            and len(self.stalled_nodes)
+            >= config.NETWORK_STALL_RATIO * len(self.node_urls)
+        )
+
+
+def build_matrices(
+    states: dict, active_nodes: list
+) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """Return node urls, a (nodes x metrics x window) block matrix and the
+    matching (nodes x window) state block matrix. Missing samples are NaN and
+    windows are aligned on the latest sample."""
+    window = max((len(states[node]) for node in active_nodes), default=0)
+    blocks = np.full((len(active_nodes), len(METRICS), window), np.nan)
+    state_blocks = np.full((len(active_nodes), window), np.nan)
+    node_urls = []
+    for i, node in enumerate(active_nodes):
+        node_states = states[node]
+        node_urls.append(node_states[-1]["url"])
+        offset = window - len(node_states)
+        for j, node_state in enumerate(node_states):
+            state_blocks[i, offset + j] = node_state["stateBlock"]
+            for k, (field, _, _) in enumerate(METRICS):
+                value = node_state.get(field)
+                if value is not None:
+                    blocks[i, k, offset + j] = value
+    return node_urls, blocks, state_blocks
+
+
+def analyze_network(states: dict, active_nodes: list) -> NetworkAnalysis:
+    """Compare every active node with its peers in one vectorized pass."""
+    node_urls, blocks, state_blocks = build_matrices(states, active_nodes)
+    if not node_urls:
+        return NetworkAnalysis([], {}, {}, [])
+
+    lags = state_blocks[:, None, :] - blocks
+    current_lags = lags[:, :, -1]
+
+    with warnings.catch_warnings():
+        # All-NaN slices (e.g. a field no node reports) are expected here.
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        medians = np.nanmedian(current_lags, axis=0)
+        deviations = np.nanmedian(np.abs(current_lags - medians), axis=0)
+        bounds = np.maximum(
+            config.PEER_DIVERGENCE_FACTOR * deviations, METRIC_BORDERS
+        )
+        divergent = (current_lags - medians) > bounds
+
+        # Rate of change over the window: how far each service advanced
+        # while the chain advanced.
+        progress = np.nanmax(blocks, axis=2) - np.nanmin(blocks, axis=2)
+        chain_progress = np.nanmax(state_blocks, axis=1) - np.nanmin(
+            state_blocks, axis=1
+        )
+        stalled = (progress[:, RECEIVER_METRIC] == 0) & (chain_progress > 0)
+
+    divergent_nodes = {}
+    for i, j in zip(*np.nonzero(divergent)):
+        divergent_nodes.setdefault(node_urls[i], []).append(METRICS[j][1])
+
+    return NetworkAnalysis(
+        node_urls=node_urls,
+        medians={
+            name: float(median)
+            for (_, name, _), median in zip(METRICS, medians)
+            if not np.isnan(median)
+        },
+        divergent_nodes=divergent_nodes,
+        stalled_nodes=[node_urls[i] for i in np.flatnonzero(stalled)],
+    )
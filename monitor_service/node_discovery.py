@@ -0,0 +1,118 @@
+import json
+import logging
+from typing import Any, Callable, Optional
+
+import config
+
+from shared import clock
+
+
+def parse_node_info(data: Any) -> Optional[dict]:
+    """Validate a node entry in the NODES_INFO format."""
+    if (
+        not isinstance(data, dict)
+        or not isinstance(data.get("url"), str)
+        or not isinstance(data.get("profile_service_url"), str)
+    ):
+        logging.warning(f"Skipping invalid node info: {data}")
+        return None
+    return data
+
+
+class NodeTargets:
+    """The nodes the monitor probes, updated in place while it runs.
+
+    Nodes come from three sources, later ones taking precedence:
+    - the list served by NODES_DISCOVERY_URL, if set, in the NODES_INFO format
+    - NODES_INFO from the environment
+    - the node_overrides Redis hash, mapping a node url to its node info as
+      JSON to add or change a node, or to "disabled" to stop probing it
+    Targets are keyed by url, and the info of an unchanged node keeps its
+    identity across refreshes.
+    """
+
+    OVERRIDES_KEY = "node_overrides"
+    DISABLED = "disabled"
+
+    def __init__(self, redis_client, get_json: Callable[[str], Optional[Any]]):
+        self.redis_client = redis_client
+        self.get_json = get_json
+        self.targets: dict[str, dict] = {}
+        self.discovered: dict[str, dict] = {}
+        self.overrides: dict[str, Optional[dict]] = {}
+        self.last_discovery = 0.0
+        for node_info in config.NODES_INFO:
+            self.targets[node_info["url"]] = node_info
+
+    def __iter__(self):
+        return iter(list(self.targets.values()))
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def discover(self) -> None:
+        now = clock.now()
+        if (
+            not config.NODES_DISCOVERY_URL
+            or now - self.last_discovery < config.NODES_DISCOVERY_INTERVAL
+        ):
+            return
+
+        self.last_discovery = now
+        nodes = self.get_json(config.NODES_DISCOVERY_URL)
+        if not isinstance(nodes, list):
+            # Keep the last discovered nodes rather than dropping them all.
+            logging.error(f"Node discovery from {config.NODES_DISCOVERY_URL} failed.")
+            return
+
+        self.discovered = {
+            node_info["url"]: node_info
+            for node_info in map(parse_node_info, nodes)
+            if node_info
+        }
+
+    def load_overrides(self) -> None:
+        try:
+            overrides_data = self.redis_client.hgetall(self.OVERRIDES_KEY)
+        except Exception as e:
+            logging.error(f"Failed to load node overrides: {e}")
+            return
+
+        overrides = {}
+        for url, value in overrides_data.items():
+            if value == self.DISABLED:
+                overrides[url] = None
+                continue
+            try:
+                node_info = parse_node_info(json.loads(value))
+            except ValueError:
+                node_info = None
+            if node_info and node_info["url"] == url:
+                overrides[url] = node_info
+            else:
+                logging.warning(f"Skipping invalid override of node {url}: {value}")
+        self.overrides = overrides
+
+    def refresh(self) -> tuple[list[str], list[str]]:
+        """Update the targets from all sources; return added and removed urls."""
+        self.discover()
+        self.load_overrides()
+
+        wanted = dict(self.discovered)
+        wanted.update((node_info["url"], node_info) for node_info in config.NODES_INFO)
+        for url, node_info in self.overrides.items():
+            if node_info is None:
+                wanted.pop(url, None)
+            else:
+                wanted[url] = node_info
+
+        added = [url for url in wanted if url not in self.targets]
+        removed = [url for url in self.targets if url not in wanted]
+        for url in removed:
+            del self.targets[url]
+        for url, node_info in wanted.items():
+            if self.targets.get(url) != node_info:
+                self.targets[url] = node_info
+        if added or removed:
+            logging.info(f"Node targets changed: added {added}, removed {removed}")
+        return added, removed
@@ -0,0 +1,52 @@
+"""Probe agent: run the monitor's HTTP probes from another vantage point.
+
+The agent probes the same targets as the monitor (node states, profile
+services and the recovery service) and publishes compact results to the
+probe_results stream of the central Redis. It raises no issues itself; the
+monitor decides by quorum over all vantage points. Give every agent its own
+PROBE_AGENT_NAME.
+"""
+
+import logging
+import time
+
+import config
+from monitor_service import (
+    node_targets,
+    parse_node_state,
+    probe_quorum,
+    send_get_request,
+)
+
+
+def probe(url: str) -> bool:
+    response = send_get_request(url)
+    return response is not None and response.status_code == 200
+
+
+def probe_targets() -> None:
+    """Probe every target once and publish the results."""
+    node_targets.refresh()
+    for node_info in node_targets:
+        response = send_get_request(node_info["url"])
+        node_state = parse_node_state(node_info["url"], response)
+        probe_quorum.publish(node_info["url"], bool(node_state))
+        profile_service_url = node_info["profile_service_url"]
+        probe_quorum.publish(profile_service_url, probe(profile_service_url))
+    probe_quorum.publish(
+        config.RECOVERY_SERVICE_URL, probe(config.RECOVERY_SERVICE_URL)
+    )
+
+
+def main() -> None:
+    while True:
+        try:
+            probe_targets()
+        except Exception as e:
+            logging.error(f"Error in probe agent {config.PROBE_AGENT_NAME}: {e}")
+        time.sleep(config.CHECK_INTERVAL)
+
+
+if __name__ == "__main__":
+    logging.info(f"Starting probe agent {config.PROBE_AGENT_NAME}...")
+    main()
@@ -0,0 +1,169 @@
+import gzip
+import json
+import logging
+import os
+import zlib
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Iterable, Iterator, Optional
+
+from shared import clock
+
+
+def request_key(method: str, url: str, payload: Any) -> str:
+    """Identify a request, so replay can answer it with the recorded result."""
+    return f"{method} {url} {json.dumps(payload, sort_keys=True)}"
+
+
+class ProbeRecorder:
+    """Write raw probe results to daily gzip-compressed JSON lines files.
+
+    Each line has the time `t`, the `kind` of entry ("get", "post" or
+    "cycle") and, for requests, the url, payload, status and response body.
+    A body of null means the request failed. Every process writes its own
+    files, named after the day and the process start time, so a restart
+    never appends to a file another process left unterminated.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = Lock()
+        self._file = None
+        self._day = ""
+        self._started = int(clock.now())
+        self._closed = False
+
+    def _open_file(self):
+        day = datetime.fromtimestamp(clock.now(), timezone.utc).strftime("%Y%m%d")
+        if day != self._day:
+            if self._file is not None:
+                self._file.close()
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(
+                self.directory, f"probes-{day}-{self._started}.jsonl.gz"
+            )
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._day = day
+        return self._file
+
+    def record(self, kind: str, **data) -> None:
+        entry = {"t": round(clock.now(), 3), "kind": kind, **data}
+        line = json.dumps(entry, separators=(",", ":"))
+        try:
+            with self._lock:
+                if not self._closed:
+                    self._open_file().write(line + "\n")
+        except Exception as e:
+            logging.error(f"Failed to record probe result: {e}")
+
+    def flush(self) -> None:
+        try:
+            with self._lock:
+                if self._file is not None:
+                    self._file.flush()
+        except Exception as e:
+            logging.error(f"Failed to flush probe log: {e}")
+
+    def close(self) -> None:
+        """Close the current file, so it ends with a complete gzip trailer."""
+        try:
+            with self._lock:
+                self._closed = True
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+        except Exception as e:
+            logging.error(f"Failed to close probe log: {e}")
+
+
+def read_probe_log(paths: Iterable[str]) -> Iterator[dict]:
+    """Yield the entries of probe log files in order.
+
+    A file cut short by a crash ends at its last complete entry.
+    """
+    for path in paths:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logging.warning(f"Skipping corrupt probe log line in {path}")
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            logging.warning(f"Probe log {path} ends early: {e}")
+
+
+def split_cycles(entries: Iterable[dict]) -> Iterator[tuple[dict, list[dict]]]:
+    """Group probe log entries by monitor cycle.
+
+    Yields each cycle entry with the requests recorded until the next cycle;
+    requests recorded before the first cycle are counted to it.
+    """
+    cycle = None
+    requests = []
+    for entry in entries:
+        if entry["kind"] != "cycle":
+            requests.append(entry)
+            continue
+        if cycle is not None:
+            yield cycle, requests
+            requests = []
+        cycle = entry
+    if cycle is not None:
+        yield cycle, requests
+
+
+class ReplayedResponse:
+    """The parts of a requests.Response the monitor checks use."""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class ProbeReplayer:
+    """Answer monitor requests with the results recorded for them."""
+
+    def __init__(self):
+        self.responses: dict[str, deque] = defaultdict(deque)
+        self.missing = 0
+
+    def load(self, entries: Iterable[dict]) -> None:
+        self.responses.clear()
+        for entry in entries:
+            key = request_key(entry["kind"], entry["url"], entry.get("payload"))
+            self.responses[key].append(entry)
+
+    def pending(self, method: str, url: str, payload: Any) -> int:
+        return len(self.responses.get(request_key(method, url, payload), ()))
+
+    def _respond(self, method: str, url: str, payload: Any) -> Optional[Any]:
+        recorded = self.responses.get(request_key(method, url, payload))
+        if not recorded:
+            self.missing += 1
+            return None
+
+        entry = recorded.popleft()
+        if entry["body"] is None:
+            return None
+        return ReplayedResponse(entry["status"], entry["body"])
+
+    def get(
+        self,
+        url: str,
+        params: Optional[dict[str, Any]] = None,
+        headers: Optional[dict[str, str]] = None,
+    ) -> Optional[ReplayedResponse]:
+        return self._respond("get", url, params)
+
+    def post(
+        self,
+        url: str,
+        request_data: Optional[dict[str, Any]] = None,
+        headers: Optional[dict[str, str]] = None,
+    ) -> Optional[ReplayedResponse]:
+        return self._respond("post", url, request_data)
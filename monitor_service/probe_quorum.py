@@ -0,0 +1,77 @@
+import logging
+
+import config
+
+from shared import clock
+
+
+class ProbeQuorum:
+    """Probe results from several vantage points, decided by quorum.
+
+    Probe agents publish one compact entry per probe (agent, url, ok) to the
+    probe_results Redis stream; its entry id tells the time on the Redis
+    server, so agent clocks do not matter. The monitor reads the new entries
+    every cycle, adds its own results, and keeps the latest result of each
+    vantage point per url. An endpoint is down when PROBE_QUORUM vantage
+    points with a result younger than PROBE_RESULT_MAX_AGE see it failing,
+    or all of them when there are fewer, so a single monitor without agents
+    behaves as before.
+    """
+
+    KEY = "probe_results"
+
+    def __init__(self, redis_client, agent: str):
+        self.redis_client = redis_client
+        self.agent = agent
+        self.last_id = "-"
+        self.results: dict[str, dict[str, tuple[float, bool]]] = {}
+
+    def publish(self, url: str, ok: bool) -> None:
+        """Publish the result of a probe run by this agent."""
+        self.redis_client.xadd(
+            self.KEY,
+            {"agent": self.agent, "url": url, "ok": int(ok)},
+            maxlen=config.PROBE_RESULTS_MAX_LEN,
+            approximate=True,
+        )
+
+    def refresh(self) -> None:
+        """Read the results published since the last refresh."""
+        try:
+            entries = self.redis_client.xrange(self.KEY, min=self.last_id)
+        except Exception as e:
+            logging.error(f"Failed to read probe results: {e}")
+            return
+
+        for entry_id, fields in entries:
+            self.last_id = f"({entry_id}"
+            try:
+                self.record(
+                    fields["url"],
+                    fields["agent"],
+                    fields["ok"] == "1",
+                    # Entry ids start with the Redis server time in ms.
+                    int(entry_id.split("-", 1)[0]) / 1000,
+                )
+            except (KeyError, ValueError) as e:
+                logging.error(f"Invalid probe result {entry_id}: {e}")
+
+    def record(self, url: str, agent: str, ok: bool, timestamp: float) -> None:
+        self.results.setdefault(url, {})[agent] = (timestamp, ok)
+
+    def record_local(self, url: str, ok: bool) -> None:
+        self.record(url, self.agent, ok, clock.now())
+
+    def is_down(self, url: str) -> bool:
+        now = clock.now()
+        votes = [
+            ok
+            for timestamp, ok in self.results.get(url, {}).values()
+            if now - timestamp <= config.PROBE_RESULT_MAX_AGE
+        ]
+        failing = votes.count(False)
+        return failing > 0 and failing >= min(config.PROBE_QUORUM, len(votes))
+
+    def forget(self, urls: list[str]) -> None:
+        for url in urls:
+            self.results.pop(url, None)
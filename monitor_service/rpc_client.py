@@ -0,0 +1,159 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+from typing import Any, Callable, Optional
+
+import config
+from latency_sketch import EndpointLatency
+
+from shared import clock
+
+PostRequest = Callable[[str, Any, dict[str, str]], Optional[Any]]
+ParseResponse = Callable[[str, Any], Optional[Any]]
+
+HEADERS = {"Content-Type": "application/json", "Cache-Control": "no-cache"}
+
+
+class HedgedRpc:
+    """Send IDChain RPC requests to several endpoints with hedging.
+
+    A request goes to the best ranked endpoint first. If it has not answered
+    by its RPC_HEDGE_QUANTILE latency, or it failed, the request also goes to
+    the next endpoint, and so on; the first valid answer wins. Endpoints are
+    ranked by block height freshness, then recent failures, then median
+    latency, so a lagging or failing endpoint only serves as a fallback.
+    Block heights come from head requests, which go to every endpoint.
+    """
+
+    def __init__(self, urls: list[str], post: PostRequest):
+        self.urls = urls
+        self.post = post
+        self.latencies = {url: EndpointLatency() for url in urls}
+        # Last block height answered by each endpoint, with the time of the answer.
+        self.block_numbers: dict[str, tuple[int, float]] = {}
+        self.failed_at: dict[str, float] = {}
+        self.lock = Lock()
+        self.executor = ThreadPoolExecutor(max_workers=4 * len(urls))
+
+    def ranked(self) -> list[str]:
+        now = clock.now()
+        with self.lock:
+            block_numbers = {
+                url: number
+                for url, (number, answered_at) in self.block_numbers.items()
+                if now - answered_at <= config.RPC_BLOCK_HEIGHT_MAX_AGE
+            }
+            best_block = max(block_numbers.values(), default=0)
+
+            def rank(url: str) -> tuple:
+                lagging = (
+                    best_block - block_numbers.get(url, best_block)
+                    > config.RPC_MAX_BLOCK_LAG
+                )
+                failed_at = self.failed_at.get(url)
+                failing = (
+                    failed_at is not None
+                    and now - failed_at < config.RPC_FAILURE_COOLDOWN
+                )
+                median = self.latencies[url].quantile(0.5)
+                return lagging, failing, median or 0.0
+
+            return sorted(self.urls, key=rank)
+
+    def hedge_delay(self, url: str) -> float:
+        with self.lock:
+            delay = self.latencies[url].quantile(config.RPC_HEDGE_QUANTILE)
+        return config.RPC_HEDGE_DELAY if delay is None else delay
+
+    def attempt(
+        self,
+        url: str,
+        request_data: Any,
+        parse: ParseResponse,
+        block_number: Optional[Callable[[Any], Optional[int]]],
+    ) -> Optional[Any]:
+        started = time.monotonic()
+        response = self.post(url, request_data, HEADERS)
+        result = parse(url, response) if response else None
+        with self.lock:
+            self.latencies[url].add(time.monotonic() - started)
+            if result is None:
+                self.failed_at[url] = clock.now()
+                return None
+
+            self.failed_at.pop(url, None)
+            number = block_number(result) if block_number else None
+            if number is not None:
+                self.block_numbers[url] = (number, clock.now())
+        return result
+
+    def call_all(
+        self,
+        request_data: Any,
+        parse: ParseResponse,
+        block_number: Callable[[Any], Optional[int]],
+    ) -> Optional[Any]:
+        """Send a head request to every endpoint; return the highest answer.
+
+        `block_number` extracts the block height from an answer. Every
+        endpoint reports its height this way, so a fast endpoint stuck on an
+        old block gets ranked down. Answers that come more than
+        RPC_HEDGE_DELAY after the first valid one only update the heights.
+        """
+        pending = {
+            self.executor.submit(self.attempt, url, request_data, parse, block_number)
+            for url in self.urls
+        }
+        results = []
+        deadline = None
+        while pending:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.result() is not None:
+                    results.append(future.result())
+                    if deadline is None:
+                        deadline = time.monotonic() + config.RPC_HEDGE_DELAY
+        return max(
+            results,
+            key=lambda result: block_number(result) or 0,
+            default=None,
+        )
+
+    def call(self, request_data: Any, parse: ParseResponse) -> Optional[Any]:
+        """Return the first valid parsed answer, or None if all endpoints fail."""
+        ranked = self.ranked()
+        if len(ranked) == 1:
+            return self.attempt(ranked[0], request_data, parse, None)
+
+        pending = set()
+        for position, url in enumerate(ranked):
+            future = self.executor.submit(self.attempt, url, request_data, parse, None)
+            pending.add(future)
+            # Wait for the requests in flight until this endpoint is slower
+            # than usual or all of them failed.
+            deadline = time.monotonic() + self.hedge_delay(url)
+            while pending and time.monotonic() < deadline:
+                done, pending = wait(
+                    pending,
+                    timeout=deadline - time.monotonic(),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    if future.result() is not None:
+                        return future.result()
+            if pending and position + 1 < len(ranked):
+                logging.info(
+                    f"RPC request to {url} is slow, "
+                    f"also sending it to {ranked[position + 1]}."
+                )
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.result() is not None:
+                    return future.result()
+        return None
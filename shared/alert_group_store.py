@@ -1,8 +1,9 @@
 import logging
-import time
 from dataclasses import dataclass
 from typing import Optional
 
+from shared import clock
+
 
 @dataclass
 class AlertGroup:
@@ -44,12 +45,23 @@ class AlertGroup:
 
 
 class AlertGroupStore:
-    def __init__(self, redis_client):
+    KEY_PREFIX = "alert_group:"
+
+    def __init__(self, redis_client, idle_ttl: Optional[int] = None):
         self.redis_client = redis_client
+        self.idle_ttl = idle_ttl
 
-    @staticmethod
-    def group_key(group_id: str) -> str:
-        return f"alert_group:{group_id}"
+    @classmethod
+    def group_key(cls, group_id: str) -> str:
+        return f"{cls.KEY_PREFIX}{group_id}"
+
+    def _save(self, group_id: str, mapping: dict) -> None:
+        """Write group fields and restart the idle expiry of the group."""
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self.group_key(group_id), mapping=mapping)
+        if self.idle_ttl:
+            pipe.expire(self.group_key(group_id), self.idle_ttl)
+        pipe.execute()
 
     def get_or_create_group(
         self, group_id: str, first_seen: Optional[int] = None
@@ -60,9 +72,9 @@ class AlertGroupStore:
 
         group = AlertGroup(
             group_id=group_id,
-            first_seen=first_seen if first_seen is not None else int(time.time()),
+            first_seen=first_seen if first_seen is not None else int(clock.now()),
         )
-        self.redis_client.hset(self.group_key(group_id), mapping=group.to_redis())
+        self._save(group_id, group.to_redis())
         return group
 
     def get_group(self, group_id: str) -> Optional[AlertGroup]:
@@ -76,14 +88,20 @@ class AlertGroupStore:
         alert_number: int,
         last_fingerprint: str,
     ) -> None:
-        self.redis_client.hset(
-            self.group_key(group_id),
-            mapping={
+        self._save(
+            group_id,
+            {
                 "last_alert": last_alert,
                 "alert_number": alert_number,
                 "last_fingerprint": last_fingerprint,
             },
         )
 
+    def scan_group_ids(self) -> list[str]:
+        return [
+            key[len(self.KEY_PREFIX) :]
+            for key in self.redis_client.scan_iter(f"{self.KEY_PREFIX}*")
+        ]
+
     def delete_group(self, group_id: str) -> None:
         self.redis_client.delete(self.group_key(group_id))
@@ -0,0 +1,54 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from shared import clock
+
+
+@dataclass
+class ChainHead:
+    block_number: int
+    block_time: int
+    updated_at: int
+
+    def to_redis(self) -> dict:
+        return {
+            "block_number": self.block_number,
+            "block_time": self.block_time,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_redis(cls, head_data: dict) -> Optional["ChainHead"]:
+        try:
+            return cls(
+                block_number=int(head_data["block_number"]),
+                block_time=int(head_data["block_time"]),
+                updated_at=int(head_data["updated_at"]),
+            )
+        except (ValueError, KeyError) as e:
+            logging.error(f"Error parsing chain head data {head_data}: {e}")
+            return None
+
+    def age(self, current_timestamp: Optional[int] = None) -> int:
+        """Seconds since the head was last refreshed from the RPC."""
+        if current_timestamp is None:
+            current_timestamp = int(clock.now())
+        return current_timestamp - self.updated_at
+
+    def is_fresh(self, max_age: int, current_timestamp: Optional[int] = None) -> bool:
+        return self.age(current_timestamp) <= max_age
+
+
+class ChainHeadStore:
+    KEY = "chain_head"
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def save_head(self, head: ChainHead) -> None:
+        self.redis_client.hset(self.KEY, mapping=head.to_redis())
+
+    def get_head(self) -> Optional[ChainHead]:
+        head_data = self.redis_client.hgetall(self.KEY)
+        return ChainHead.from_redis(head_data) if head_data else None
@@ -0,0 +1,44 @@
+import time
+
+
+class Clock:
+    """Wall clock used for issue and alert timing."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """Clock that only moves when told to, for replaying recorded probes."""
+
+    def __init__(self, start: float = 0.0):
+        self.current = start
+
+    def time(self) -> float:
+        return self.current
+
+    def sleep(self, seconds: float) -> None:
+        self.current += seconds
+
+    def set(self, timestamp: float) -> None:
+        self.current = max(self.current, timestamp)
+
+
+_clock: Clock = Clock()
+
+
+def use(clock: Clock) -> None:
+    """Replace the clock used by all services in this process."""
+    global _clock
+    _clock = clock
+
+
+def now() -> float:
+    return _clock.time()
+
+
+def sleep(seconds: float) -> None:
+    _clock.sleep(seconds)
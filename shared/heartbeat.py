@@ -0,0 +1,90 @@
+import logging
+from typing import Optional
+
+from shared import clock
+
+
+class HeartbeatReporter:
+    """Publish service liveness and progress to the health:<service> hash.
+
+    Besides the time of the last write, the hash tells how far the current
+    cycle got, so the watchdog can tell a slow cycle from a hung service, and
+    how many cycles in a row failed, so it can restart a service that is
+    alive but no longer working.
+    """
+
+    def __init__(self, redis_client, service: str, min_interval: int = 1):
+        self.redis_client = redis_client
+        self.key = f"health:{service}"
+        self.min_interval = min_interval
+        self.cycle = 0
+        self.cycle_started_at = 0.0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.current_stage = ""
+        self.last_write = 0.0
+        self.initialized = False
+
+    def start_cycle(self) -> None:
+        self.cycle += 1
+        self.cycle_started_at = clock.now()
+        self.current_stage = ""
+        self.stage("started")
+
+    def stage(self, name: str, backlog: Optional[int] = None) -> None:
+        """Report progress; repeated reports of the same stage are throttled."""
+        now = clock.now()
+        if name == self.current_stage and now - self.last_write < self.min_interval:
+            return
+
+        mapping = {"stage": name}
+        if name != self.current_stage:
+            # Moving on to another stage means the previous one completed.
+            mapping["completed_stage"] = self.current_stage
+        self.current_stage = name
+        if backlog is not None:
+            mapping["backlog"] = backlog
+        self._write(mapping)
+
+    def finish_cycle(self) -> None:
+        now = clock.now()
+        self.consecutive_errors = 0
+        completed_stage = self.current_stage
+        self.current_stage = "idle"
+        self._write(
+            {
+                "stage": "idle",
+                "completed_stage": completed_stage,
+                "backlog": 0,
+                "last_completed_at": int(now),
+                "last_cycle_duration": round(now - self.cycle_started_at, 2),
+            }
+        )
+
+    def record_error(self) -> None:
+        self.errors += 1
+        self.consecutive_errors += 1
+        self.current_stage = "failed"
+        self._write({"stage": "failed"})
+
+    def _write(self, mapping: dict) -> None:
+        now = clock.now()
+        mapping.update(
+            {
+                "cycle": self.cycle,
+                "cycle_started_at": int(self.cycle_started_at),
+                "errors": self.errors,
+                "consecutive_errors": self.consecutive_errors,
+                "updated_at": int(now),
+            }
+        )
+        try:
+            if not self.initialized:
+                # Older versions stored the heartbeat as a plain timestamp.
+                if self.redis_client.type(self.key) not in ("hash", "none"):
+                    self.redis_client.delete(self.key)
+                self.initialized = True
+            self.redis_client.hset(self.key, mapping=mapping)
+            self.last_write = now
+        except Exception as e:
+            logging.error(f"Failed to write heartbeat {self.key}: {e}")
@@ -0,0 +1,170 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class HistoryEvent:
+    """One entry of the alert history.
+
+    `event` is "opened" or "resolved" for issues and "notified" for sent
+    notifications. Resolved events carry how long the issue was open in
+    `duration`; notified events carry the channels that received the message
+    and the `latency` from the last issue change to delivery.
+    """
+
+    event: str
+    group_id: str
+    group_name: str
+    issue_id: str = ""
+    issue_type: str = ""
+    severity: str = ""
+    duration: Optional[int] = None
+    channels: list[str] = field(default_factory=list)
+    latency: Optional[int] = None
+    fingerprint: str = ""
+    # Both come from the stream entry id once the event is stored.
+    timestamp: float = 0.0
+    id: str = ""
+
+    def to_redis(self) -> dict:
+        data = {
+            "event": self.event,
+            "group_id": self.group_id,
+            "group_name": self.group_name,
+            "issue_id": self.issue_id,
+            "issue_type": self.issue_type,
+            "severity": self.severity,
+            "duration": self.duration,
+            "channels": ",".join(self.channels),
+            "latency": self.latency,
+            "fingerprint": self.fingerprint,
+        }
+        return {key: value for key, value in data.items() if value not in (None, "")}
+
+    @classmethod
+    def from_redis(cls, entry_id: str, data: dict) -> Optional["HistoryEvent"]:
+        try:
+            return cls(
+                event=data["event"],
+                group_id=data["group_id"],
+                group_name=data["group_name"],
+                issue_id=data.get("issue_id", ""),
+                issue_type=data.get("issue_type", ""),
+                severity=data.get("severity", ""),
+                duration=int(data["duration"]) if "duration" in data else None,
+                channels=data["channels"].split(",") if "channels" in data else [],
+                latency=int(data["latency"]) if "latency" in data else None,
+                fingerprint=data.get("fingerprint", ""),
+                timestamp=int(entry_id.split("-")[0]) / 1000,
+                id=entry_id,
+            )
+        except (ValueError, KeyError) as e:
+            logging.error(f"Error parsing history event {entry_id} {data}: {e}")
+            return None
+
+
+class HistoryStore:
+    """Append-only history of issue and notification events in a Redis stream.
+
+    The stream is trimmed to roughly `max_events` entries. Entry ids are the
+    append time in milliseconds, so time range queries map to XRANGE.
+    Recording never raises: losing a history entry must not stop alerting.
+    """
+
+    KEY = "alert_history"
+
+    def __init__(self, redis_client, max_events: int):
+        self.redis_client = redis_client
+        self.max_events = max_events
+
+    def record(self, event: HistoryEvent) -> None:
+        try:
+            self.redis_client.xadd(
+                self.KEY,
+                event.to_redis(),
+                maxlen=self.max_events,
+                approximate=True,
+            )
+        except Exception as e:
+            logging.error(f"Failed to record {event.event} history event: {e}")
+
+    def record_issue_event(
+        self,
+        event: str,
+        issue_id: str,
+        group_id: str,
+        group_name: str,
+        issue_type: str,
+        severity: str = "",
+        duration: Optional[int] = None,
+    ) -> None:
+        self.record(
+            HistoryEvent(
+                event=event,
+                group_id=group_id,
+                group_name=group_name,
+                issue_id=issue_id,
+                issue_type=issue_type,
+                severity=severity,
+                duration=duration,
+            )
+        )
+
+    def record_notification(
+        self,
+        group_id: str,
+        group_name: str,
+        channels: list[str],
+        latency: int,
+        fingerprint: str,
+    ) -> None:
+        self.record(
+            HistoryEvent(
+                event="notified",
+                group_id=group_id,
+                group_name=group_name,
+                channels=channels,
+                latency=latency,
+                fingerprint=fingerprint,
+            )
+        )
+
+    def events(
+        self,
+        start: float,
+        end: float,
+        group_id: Optional[str] = None,
+        event: Optional[str] = None,
+    ) -> list[HistoryEvent]:
+        """Return events between two unix timestamps, oldest first."""
+        entries = self.redis_client.xrange(
+            self.KEY, min=int(start * 1000), max=int(end * 1000)
+        )
+        events = []
+        for entry_id, data in entries:
+            history_event = HistoryEvent.from_redis(entry_id, data)
+            if history_event is None:
+                continue
+            if group_id is not None and history_event.group_id != group_id:
+                continue
+            if event is not None and history_event.event != event:
+                continue
+            events.append(history_event)
+        return events
+
+    def mean_time_to_resolve(
+        self, start: float, end: float, group_id: Optional[str] = None
+    ) -> dict[str, float]:
+        """Return the mean open duration of issues resolved in the range,
+        by group name."""
+        durations: dict[str, list[int]] = {}
+        for history_event in self.events(start, end, group_id, "resolved"):
+            if history_event.duration is not None:
+                durations.setdefault(history_event.group_name, []).append(
+                    history_event.duration
+                )
+        return {
+            group_name: sum(values) / len(values)
+            for group_name, values in durations.items()
+        }
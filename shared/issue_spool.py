@@ -0,0 +1,57 @@
+import json
+import logging
+import os
+import time
+
+
+class IssueSpool:
+    """Append-only local file of the issue writes made while Redis is down.
+
+    Every write is one JSON line, flushed to the OS when appended. The file is
+    fsynced at most once per `fsync_interval` seconds and on `sync()`, so a
+    burst of writes during an outage costs one disk sync. Entries left by an
+    earlier run are kept until they are replayed.
+    """
+
+    def __init__(self, path: str, fsync_interval: float):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a", encoding="utf-8")
+        self.pending = len(self.entries())
+        self.last_fsync = time.monotonic()
+        self.unsynced = False
+
+    def append(self, op: str, args: list) -> None:
+        self.file.write(json.dumps({"op": op, "args": args}) + "\n")
+        self.file.flush()
+        self.pending += 1
+        self.unsynced = True
+        if time.monotonic() - self.last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = False
+        self.last_fsync = time.monotonic()
+
+    def entries(self) -> list[tuple[str, list]]:
+        entries = []
+        with open(self.path, encoding="utf-8") as spool_file:
+            for line in spool_file:
+                try:
+                    entry = json.loads(line)
+                    entries.append((entry["op"], entry["args"]))
+                except (ValueError, KeyError):
+                    # A line torn by a crash during an append.
+                    logging.warning(f"Skipping invalid spool entry: {line!r}")
+        return entries
+
+    def clear(self) -> None:
+        self.file.truncate(0)
+        self.pending = 0
+        self.unsynced = True
+        self.sync()
@@ -1,8 +1,13 @@
+import json
 import logging
-import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional
 
+import redis
+
+from shared import clock
+from shared.issue_spool import IssueSpool
+
 
 @dataclass
 class Issue:
@@ -16,6 +21,8 @@ class Issue:
     message: str
     started_at: int
     updated_at: int
+    flap_score: int = 0
+    fields: dict = field(default_factory=dict)
 
     def to_redis(self) -> dict:
         return {
@@ -29,6 +36,8 @@ class Issue:
             "message": self.message,
             "started_at": self.started_at,
             "updated_at": self.updated_at,
+            "flap_score": self.flap_score,
+            "fields": json.dumps(self.fields),
         }
 
     @classmethod
@@ -51,20 +60,112 @@ class Issue:
                 message=issue_data["message"],
                 started_at=int(issue_data["started_at"]),
                 updated_at=int(issue_data["updated_at"]),
+                flap_score=int(issue_data.get("flap_score", 0)),
+                fields=json.loads(issue_data.get("fields") or "{}"),
             )
         except (ValueError, KeyError) as e:
             logging.error(f"Error parsing issue data {issue_data}: {e}")
             return None
 
 
+# Every mutation of an issue bumps the version of its group to a new value
+# of a global sequence, so the alert service can skip unchanged groups with a
+# single comparison. A global sequence keeps versions unique even when a group
+# is deleted and later created again.
+BUMP_GROUP_VERSION_SCRIPT = """
+local version = redis.call('INCR', KEYS[1])
+redis.call('HSET', KEYS[2], ARGV[1], version)
+return version
+"""
+
+# Only touch an issue hash that still exists, so a late write never leaves a
+# partial hash behind after the alert service deleted the issue. Resolving an
+# issue that is already resolved is a no-op, so repeated resolves neither
+# extend its TTL nor bump its group version. ARGV[1] is an optional TTL in
+# seconds, the rest are field/value pairs.
+UPDATE_ISSUE_SCRIPT = """
+local group_id = redis.call('HGET', KEYS[1], 'group_id')
+if not group_id then
+    return 0
+end
+for i = 2, #ARGV, 2 do
+    if ARGV[i] == 'resolved' and ARGV[i + 1] == '1'
+        and redis.call('HGET', KEYS[1], 'resolved') == '1' then
+        return 0
+    end
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+if tonumber(ARGV[1]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+redis.call('HSET', KEYS[3], group_id, redis.call('INCR', KEYS[2]))
+return 1
+"""
+
+# KEYS[4] is the issue index of the group ARGV[2] the issue belongs to.
+DELETE_ISSUE_SCRIPT = """
+local deleted = redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[4], ARGV[1])
+if deleted == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[3], ARGV[2], redis.call('INCR', KEYS[2]))
+return 1
+"""
+
+# Forget a group once its issue index is empty. Checked and applied atomically
+# so an issue inserted concurrently always keeps its group version.
+FORGET_EMPTY_GROUP_SCRIPT = """
+if redis.call('SCARD', KEYS[1]) > 0 then
+    return 0
+end
+redis.call('HDEL', KEYS[2], ARGV[1])
+return 1
+"""
+
+
 class IssueStore:
-    def __init__(self, redis_client):
+    """Issues in Redis, indexed and versioned by group.
+
+    With a spool, writes made while Redis is unreachable go to the spool
+    instead of failing, and `issue_exists` answers from the last known state.
+    The spool is replayed in order once Redis is back, in pipelined batches.
+    Replaying is idempotent, so a replay cut short is simply retried.
+    """
+
+    VERSION_SEQUENCE_KEY = "alert_group_version_seq"
+    GROUP_VERSIONS_KEY = "alert_group_versions"
+    GROUP_ISSUES_PREFIX = "group_issues:"
+    REPLAY_BATCH = 500
+
+    def __init__(
+        self,
+        redis_client,
+        spool: Optional[IssueSpool] = None,
+        retry_interval: float = 10,
+    ):
         self.redis_client = redis_client
+        self.spool = spool
+        self.retry_interval = retry_interval
+        self.next_replay = 0.0
+        self.known_issues: dict[str, bool] = {}
+        self._bump_group_version = redis_client.register_script(
+            BUMP_GROUP_VERSION_SCRIPT
+        )
+        self._update_issue = redis_client.register_script(UPDATE_ISSUE_SCRIPT)
+        self._delete_issue = redis_client.register_script(DELETE_ISSUE_SCRIPT)
+        self._forget_empty_group = redis_client.register_script(
+            FORGET_EMPTY_GROUP_SCRIPT
+        )
 
     @staticmethod
     def issue_key(issue_id: str) -> str:
         return f"issue:{issue_id}"
 
+    @classmethod
+    def group_issues_key(cls, group_id: str) -> str:
+        return f"{cls.GROUP_ISSUES_PREFIX}{group_id}"
+
     def insert_new_issue(
         self,
         issue_id: str,
@@ -74,8 +175,36 @@ class IssueStore:
         group_name: str,
         issue_type: str,
         severity: str,
+        fields: Optional[dict] = None,
+    ) -> None:
+        self._write(
+            "insert",
+            [
+                issue_id,
+                message,
+                group_id,
+                group_type,
+                group_name,
+                issue_type,
+                severity,
+                fields or {},
+                int(clock.now()),
+            ],
+        )
+
+    def _insert_issue(
+        self,
+        client,
+        issue_id: str,
+        message: str,
+        group_id: str,
+        group_type: str,
+        group_name: str,
+        issue_type: str,
+        severity: str,
+        fields: dict,
+        now: int,
     ) -> None:
-        now = int(time.time())
         issue = Issue(
             id=issue_id,
             group_id=group_id,
@@ -87,18 +216,161 @@ class IssueStore:
             message=message,
             started_at=now,
             updated_at=now,
+            fields=fields,
         )
-        self.redis_client.hset(self.issue_key(issue_id), mapping=issue.to_redis())
+        client.hset(self.issue_key(issue_id), mapping=issue.to_redis())
+        client.sadd(self.group_issues_key(group_id), issue_id)
+        self._bump_group_version(
+            keys=[self.VERSION_SEQUENCE_KEY, self.GROUP_VERSIONS_KEY],
+            args=[group_id],
+            client=client,
+        )
+
+    def _apply(self, client, op: str, args: list) -> None:
+        if op == "insert":
+            self._insert_issue(client, *args)
+        elif op == "update":
+            self.update_issue(*args, client=client)
+        elif op == "delete":
+            self._delete_issue(
+                keys=[
+                    self.issue_key(args[0]),
+                    self.VERSION_SEQUENCE_KEY,
+                    self.GROUP_VERSIONS_KEY,
+                    self.group_issues_key(args[1]),
+                ],
+                args=args,
+                client=client,
+            )
+
+    def _write(self, op: str, args: list) -> bool:
+        """Apply a write, or spool it while Redis is unreachable.
+
+        Return False when the write changed nothing, and True when it did or
+        was spooled.
+        """
+        if self.spool is not None:
+            if op != "update":
+                self.known_issues[args[0]] = op == "insert"
+            if self.spool.pending and not self.replay_spool():
+                self.spool.append(op, args)
+                return True
+
+        try:
+            pipe = self.redis_client.pipeline()
+            self._apply(pipe, op, args)
+            return bool(pipe.execute()[-1])
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            if self.spool is None:
+                raise
+            logging.warning(f"Redis is unreachable, spooling issue writes: {e}")
+            self.spool.append(op, args)
+            self.next_replay = clock.now() + self.retry_interval
+            return True
+
+    def replay_spool(self) -> bool:
+        """Replay the spooled writes; return True when none are left."""
+        if self.spool is None or not self.spool.pending:
+            return True
+        if clock.now() < self.next_replay:
+            return False
+
+        entries = self.spool.entries()
+        try:
+            for start in range(0, len(entries), self.REPLAY_BATCH):
+                batch = entries[start : start + self.REPLAY_BATCH]
+                pipe = self.redis_client.pipeline(transaction=False)
+                for _, args in batch:
+                    pipe.hget(self.issue_key(args[0]), "resolved")
+                resolved_values = pipe.execute()
+
+                pipe = self.redis_client.pipeline(transaction=False)
+                touched = set()
+                for (op, args), resolved in zip(batch, resolved_values):
+                    if op == "insert" and resolved == "0" and args[0] not in touched:
+                        # The issue was already open before the outage; keep
+                        # its start time.
+                        continue
+                    touched.add(args[0])
+                    self._apply(pipe, op, args)
+                pipe.execute()
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            logging.warning(f"Redis is still unreachable: {e}")
+            self.next_replay = clock.now() + self.retry_interval
+            return False
+
+        logging.info(f"Replayed {len(entries)} spooled issue writes.")
+        self.spool.clear()
+        return True
+
+    def flush_spool(self) -> None:
+        """Replay the spool when Redis is back, or else sync it to disk."""
+        if self.spool is not None and not self.replay_spool():
+            self.spool.sync()
+
+    def get_issue(self, issue_id: str) -> Optional[Issue]:
+        try:
+            issue_data = self.redis_client.hgetall(self.issue_key(issue_id))
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError):
+            if self.spool is None:
+                raise
+            return None
+        return Issue.from_redis(issue_data) if issue_data else None
 
     def issue_exists(self, issue_id: str) -> bool:
-        return bool(self.redis_client.exists(self.issue_key(issue_id)))
+        if self.spool is None:
+            return bool(self.redis_client.exists(self.issue_key(issue_id)))
+
+        if not self.spool.pending:
+            try:
+                exists = bool(self.redis_client.exists(self.issue_key(issue_id)))
+                self.known_issues[issue_id] = exists
+                return exists
+            except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError):
+                pass
+        return self.known_issues.get(issue_id, False)
+
+    def update_issue(
+        self,
+        issue_id: str,
+        mapping: dict,
+        ttl: Optional[int] = None,
+        client=None,
+    ) -> bool:
+        """Update fields of an existing issue and bump its group version."""
+        args = [ttl or 0]
+        args.extend(item for field_value in mapping.items() for item in field_value)
+        return bool(
+            self._update_issue(
+                keys=[
+                    self.issue_key(issue_id),
+                    self.VERSION_SEQUENCE_KEY,
+                    self.GROUP_VERSIONS_KEY,
+                ],
+                args=args,
+                client=client,
+            )
+        )
 
-    def mark_issue_resolved(self, issue_id: str, message: str) -> None:
-        self.redis_client.hset(
-            self.issue_key(issue_id),
-            mapping={"resolved": 1, "message": message, "updated_at": int(time.time())},
+    def mark_issue_resolved(
+        self, issue_id: str, message: str, ttl: Optional[int] = None
+    ) -> bool:
+        """Mark an issue resolved; with a TTL it expires if nobody deletes it.
+
+        Return False when the issue is missing or already resolved.
+        """
+        return self._write(
+            "update",
+            [
+                issue_id,
+                {"resolved": 1, "message": message, "updated_at": int(clock.now())},
+                ttl,
+            ],
         )
 
+    def update_flap_score(self, issue_id: str, flap_score: int) -> None:
+        self._write("update", [issue_id, {"flap_score": flap_score}])
+
     def fetch_issues(self) -> list[Issue]:
         issues = []
         for key in self.redis_client.scan_iter("issue:*"):
@@ -107,5 +379,70 @@ class IssueStore:
                 issues.append(issue)
         return issues
 
-    def delete_issue(self, issue_id: str) -> None:
-        self.redis_client.delete(self.issue_key(issue_id))
+    def group_versions(self) -> dict[str, int]:
+        """Return the current version of every known group."""
+        versions = self.redis_client.hgetall(self.GROUP_VERSIONS_KEY)
+        return {group_id: int(version) for group_id, version in versions.items()}
+
+    def fetch_group_issues(self, group_id: str) -> list[Issue]:
+        """Fetch the issues of one group through its issue index."""
+        issue_ids = sorted(self.redis_client.smembers(self.group_issues_key(group_id)))
+        if not issue_ids:
+            return []
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for issue_id in issue_ids:
+            pipe.hgetall(self.issue_key(issue_id))
+
+        issues = []
+        missing_ids = []
+        for issue_id, issue_data in zip(issue_ids, pipe.execute()):
+            if not issue_data:
+                missing_ids.append(issue_id)
+                continue
+            issue = Issue.from_redis(issue_data)
+            if issue:
+                issues.append(issue)
+
+        if missing_ids:
+            self.redis_client.srem(self.group_issues_key(group_id), *missing_ids)
+        return issues
+
+    def prune_group(self, group_id: str) -> bool:
+        """Drop expired issues from a group index and forget the group if it
+        became empty. Returns True when the group was forgotten."""
+        index_key = self.group_issues_key(group_id)
+        issue_ids = list(self.redis_client.smembers(index_key))
+        if issue_ids:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for issue_id in issue_ids:
+                pipe.exists(self.issue_key(issue_id))
+            expired_ids = [
+                issue_id
+                for issue_id, exists in zip(issue_ids, pipe.execute())
+                if not exists
+            ]
+            if expired_ids:
+                self.redis_client.srem(index_key, *expired_ids)
+                self._bump_group_version(
+                    keys=[self.VERSION_SEQUENCE_KEY, self.GROUP_VERSIONS_KEY],
+                    args=[group_id],
+                )
+
+        return bool(
+            self._forget_empty_group(
+                keys=[index_key, self.GROUP_VERSIONS_KEY], args=[group_id]
+            )
+        )
+
+    def rebuild_group_index(self) -> None:
+        """Index and version issues written before groups were versioned."""
+        for issue in self.fetch_issues():
+            if self.redis_client.sadd(self.group_issues_key(issue.group_id), issue.id):
+                self._bump_group_version(
+                    keys=[self.VERSION_SEQUENCE_KEY, self.GROUP_VERSIONS_KEY],
+                    args=[issue.group_id],
+                )
+
+    def delete_issue(self, issue_id: str, group_id: str) -> None:
+        self._write("delete", [issue_id, group_id])
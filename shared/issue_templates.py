@@ -0,0 +1,197 @@
+from dataclasses import dataclass, field
+from string import Formatter
+from typing import Optional
+
+
+class CompiledTemplate:
+    """A format string parsed once into literal text and field references."""
+
+    def __init__(self, template: str):
+        self.parts = [
+            (literal, name, spec or "")
+            for literal, name, spec, _ in Formatter().parse(template)
+        ]
+
+    def render(self, fields: dict) -> str:
+        return "".join(
+            literal + (format(fields[name], spec) if name is not None else "")
+            for literal, name, spec in self.parts
+        )
+
+
+@dataclass(frozen=True)
+class IssueTemplate:
+    """Text of one issue type.
+
+    `subject` names what the issue is about (node, profile service, app) and
+    is kept in the resolved message; `details` are only shown while active.
+    In grouped views the subject is left out when the group header already
+    shows it.
+    """
+
+    title: str
+    resolved_title: str
+    subject: Optional[str] = None
+    details: tuple[str, ...] = ()
+    subject_in_summary: bool = False
+    compiled: dict = field(default_factory=dict, compare=False, repr=False)
+
+    def __post_init__(self):
+        subject = [self.subject] if self.subject else []
+        summary_subject = subject if self.subject_in_summary else []
+        self.compiled.update(
+            active=CompiledTemplate(
+                "\n".join([f"⚠️ {self.title}", *subject, *self.details])
+            ),
+            resolved=CompiledTemplate(
+                "\n".join([f"✅ {self.resolved_title}", *subject])
+            ),
+            active_summary=CompiledTemplate(
+                " ".join([self.title, *summary_subject, *self.details])
+            ),
+            resolved_summary=CompiledTemplate(
+                " ".join([self.resolved_title, *summary_subject])
+            ),
+        )
+
+    def render(self, view: str, fields: dict) -> str:
+        return self.compiled[view].render(fields)
+
+
+ISSUE_TEMPLATES = {
+    # Node issues
+    "node_state": IssueTemplate(
+        "BrightID node is not reporting its state.",
+        "BrightID node state issue resolved.",
+        "Node: {node}",
+    ),
+    "node_state_latency_degraded": IssueTemplate(
+        "BrightID node is responding slowly.",
+        "BrightID node response time recovered.",
+        "Node: {node}",
+        ("p95 latency: {p95:.2f}s", "Border: {border}s"),
+    ),
+    "node_balance": IssueTemplate(
+        "BrightID node has low Eidi balance.",
+        "BrightID node Eidi balance issue resolved.",
+        "Node: {node}",
+        ("Balance: {balance:.2f} Eidi", "Threshold: {threshold} Eidi"),
+    ),
+    "node_balance_forecast": IssueTemplate(
+        "BrightID node Eidi balance is running out.",
+        "BrightID node Eidi balance is no longer running out.",
+        "Node: {node}",
+        ("Balance: {balance:.2f} Eidi", "Empty in: {hours:.0f} hours"),
+    ),
+    "receiver": IssueTemplate(
+        "BrightID node consensus receiver service is offline.",
+        "BrightID node consensus receiver service issue resolved.",
+        "Node: {node}",
+    ),
+    "scorer": IssueTemplate(
+        "BrightID node scorer service is offline.",
+        "BrightID node scorer service issue resolved.",
+        "Node: {node}",
+    ),
+    "sender": IssueTemplate(
+        "BrightID node consensus sender service is offline.",
+        "BrightID node consensus sender service issue resolved.",
+        "Node: {node}",
+    ),
+    "profile": IssueTemplate(
+        "BrightID node profile service is unavailable.",
+        "BrightID node profile service issue resolved.",
+        "Profile Service: {profile_service}",
+        subject_in_summary=True,
+    ),
+    "profile_latency_degraded": IssueTemplate(
+        "BrightID node profile service is responding slowly.",
+        "BrightID node profile service response time recovered.",
+        "Profile Service: {profile_service}",
+        ("p95 latency: {p95:.2f}s", "Border: {border}s"),
+        subject_in_summary=True,
+    ),
+    "node_version": IssueTemplate(
+        "BrightID node is outdated.",
+        "BrightID node updated to latest version.",
+        "Node: {node}",
+        ("Version: v{version}", "Last Version: v{last_version}"),
+    ),
+    "peer_divergence": IssueTemplate(
+        "BrightID node is lagging behind its peers.",
+        "BrightID node caught up with its peers.",
+        "Node: {node}",
+        ("Services: {services}",),
+    ),
+    # Updater service issues
+    "apps_updater": IssueTemplate(
+        "BrightID node apps updater service is offline.",
+        "BrightID node apps updater service issue resolved.",
+        "Node: {node}",
+    ),
+    "sponsorships_updater": IssueTemplate(
+        "BrightID node sponsorship updater service is offline.",
+        "BrightID node sponsorship updater service issue resolved.",
+        "Node: {node}",
+    ),
+    "seed_groups_updater": IssueTemplate(
+        "BrightID node seed group updater service is offline.",
+        "BrightID node seed group updater service issue resolved.",
+        "Node: {node}",
+    ),
+    # System services issues
+    "idchain_rpc": IssueTemplate(
+        "IDChain RPC is unavailable.",
+        "IDChain RPC issue resolved.",
+        details=("RPC: {rpc_url}",),
+    ),
+    "node_one_state": IssueTemplate(
+        "BrightID node one is not reporting its state.",
+        "BrightID node one state issue resolved.",
+    ),
+    "recovery_service": IssueTemplate(
+        "BrightID recovery service is unavailable.",
+        "BrightID recovery service issue resolved.",
+    ),
+    "recovery_latency_degraded": IssueTemplate(
+        "BrightID recovery service is responding slowly.",
+        "BrightID recovery service response time recovered.",
+        details=("p95 latency: {p95:.2f}s", "Border: {border}s"),
+    ),
+    "backup_service": IssueTemplate(
+        "BrightID node backup service is offline.",
+        "BrightID node backup service issue resolved.",
+    ),
+    "network_stall": IssueTemplate(
+        "BrightID nodes stopped processing IDChain blocks.",
+        "BrightID nodes resumed processing IDChain blocks.",
+        details=("Stalled Nodes: {stalled} of {total}",),
+    ),
+    # Application issues
+    "app_sp_balance": IssueTemplate(
+        "App has low unused Sponsorships.",
+        "App Sponsorships balance issue resolved.",
+        "App: {app}",
+        ("Balance: {balance}",),
+        subject_in_summary=True,
+    ),
+    "app_sp_balance_forecast": IssueTemplate(
+        "App unused Sponsorships are running out.",
+        "App unused Sponsorships are no longer running out.",
+        "App: {app}",
+        ("Balance: {balance}", "Empty in: {hours:.0f} hours"),
+        subject_in_summary=True,
+    ),
+}
+
+
+def render_issue_message(issue_type: str, fields: dict, resolved: bool = False) -> str:
+    """Render the standalone message of an issue."""
+    view = "resolved" if resolved else "active"
+    return ISSUE_TEMPLATES[issue_type].render(view, fields)
+
+
+def render_issue_summary(issue_type: str, fields: dict, resolved: bool = False) -> str:
+    """Render the one-line form of an issue used in grouped messages."""
+    view = "resolved_summary" if resolved else "active_summary"
+    return ISSUE_TEMPLATES[issue_type].render(view, fields)
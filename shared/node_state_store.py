@@ -0,0 +1,54 @@
+import json
+import logging
+from typing import Optional
+
+
+class NodeStateStore:
+    """Last state reported by each node, keyed by its eth signing address.
+
+    Every save bumps a version counter, so readers can poll the cheap counter
+    and only load the states when they changed.
+    """
+
+    KEY = "node_states"
+    VERSION_KEY = "node_states_version"
+
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+
+    def save_states(self, node_states: dict[str, dict]) -> None:
+        if not node_states:
+            return
+
+        pipe = self.redis_client.pipeline()
+        pipe.hset(
+            self.KEY,
+            mapping={
+                signer: json.dumps(node_state)
+                for signer, node_state in node_states.items()
+            },
+        )
+        pipe.incr(self.VERSION_KEY)
+        pipe.execute()
+
+    def delete_states(self, signers: list[str]) -> None:
+        if not signers:
+            return
+
+        pipe = self.redis_client.pipeline()
+        pipe.hdel(self.KEY, *signers)
+        pipe.incr(self.VERSION_KEY)
+        pipe.execute()
+
+    def get_version(self) -> Optional[int]:
+        version = self.redis_client.get(self.VERSION_KEY)
+        return int(version) if version is not None else None
+
+    def get_states(self) -> dict[str, dict]:
+        node_states = {}
+        for signer, data in self.redis_client.hgetall(self.KEY).items():
+            try:
+                node_states[signer] = json.loads(data)
+            except ValueError as e:
+                logging.error(f"Error parsing state of node {signer}: {e}")
+        return node_states
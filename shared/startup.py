@@ -0,0 +1,37 @@
+import logging
+import time
+
+
+class StartupTimer:
+    """Break down the time from process start to the first completed cycle.
+
+    Create it right after the module imports: the CPU time used up to that
+    point is reported as the interpreter and import cost.
+    """
+
+    def __init__(self):
+        self.import_cpu_time = time.process_time()
+        self.started = time.perf_counter()
+        self.last_mark = self.started
+        self.stages: list[tuple[str, float]] = []
+        self.reported = False
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last_mark))
+        self.last_mark = now
+
+    def finish(self, stage: str) -> None:
+        """Mark the last stage and log the breakdown, once per process."""
+        if self.reported:
+            return
+
+        self.mark(stage)
+        self.reported = True
+        breakdown = ", ".join(
+            f"{stage} {duration:.2f}s" for stage, duration in self.stages
+        )
+        logging.info(
+            f"Startup timing: imports {self.import_cpu_time:.2f}s cpu, {breakdown}, "
+            f"total {self.last_mark - self.started:.2f}s after imports"
+        )
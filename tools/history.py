@@ -0,0 +1,69 @@
+"""Print the alert history and the mean time to resolve per group.
+
+Reads the alert_history stream the monitor and alert services record issue
+and notification events to, for the last hours or a given group.
+
+    python tools/history.py --redis-port 6379 --hours 48 --event resolved
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import redis
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from shared.history_store import HistoryEvent, HistoryStore  # noqa: E402
+
+
+def format_timestamp(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def describe(history_event: HistoryEvent) -> str:
+    if history_event.event == "notified":
+        return (
+            f"{', '.join(history_event.channels)} after "
+            f"{history_event.latency} seconds"
+        )
+    details = f"{history_event.issue_type} {history_event.severity}".strip()
+    if history_event.duration is not None:
+        details += f" after {history_event.duration // 60} minutes"
+    return details
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-host", default="localhost")
+    parser.add_argument("--redis-port", type=int, required=True)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--group", help="only the events of this group id")
+    parser.add_argument("--event", choices=("opened", "resolved", "notified"))
+    args = parser.parse_args()
+
+    history_store = HistoryStore(
+        redis.Redis(host=args.redis_host, port=args.redis_port, decode_responses=True),
+        # Only read here, so the trim length does not matter.
+        max_events=0,
+    )
+    end = time.time()
+    start = end - args.hours * 3600
+    for history_event in history_store.events(start, end, args.group, args.event):
+        print(
+            f"{format_timestamp(history_event.timestamp)}  "
+            f"{history_event.event:<8}  {history_event.group_name}  "
+            f"{describe(history_event)}"
+        )
+
+    print("\nMean time to resolve:")
+    mean_times = history_store.mean_time_to_resolve(start, end, args.group)
+    for group_name, seconds in sorted(mean_times.items()):
+        print(f"{group_name}: {seconds / 60:.1f} minutes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Replay recorded monitor probes through the checks and alert grouping.
+
+Loads the monitor and alert services with the current environment (so borders
+can be overridden per run), answers their requests from probe log files
+written with PROBE_LOG_DIR, and runs them on a virtual clock as fast as
+possible. Issues and alert groups are written to the given Redis, which must
+be a scratch instance.
+
+    set -a; . ./config.env; set +a
+    RECEIVER_BORDER=36 python tools/replay.py --redis-port 6380 logs/*.jsonl.gz
+"""
+
+import argparse
+import importlib
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from shared import clock  # noqa: E402
+from shared.clock import VirtualClock  # noqa: E402
+
+
+def load_service(name: str):
+    """Import a service module together with its own config module."""
+    service_dir = str(ROOT / name)
+    sys.path.insert(0, service_dir)
+    sys.modules.pop("config", None)
+    try:
+        return importlib.import_module(name)
+    finally:
+        sys.path.remove(service_dir)
+
+
+def format_timestamp(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="probe log files, oldest first")
+    parser.add_argument("--redis-host", default="localhost")
+    parser.add_argument("--redis-port", type=int, required=True)
+    parser.add_argument(
+        "--flush",
+        action="store_true",
+        help="empty the Redis database before replaying",
+    )
+    args = parser.parse_args()
+
+    os.environ["REDIS_HOST"] = args.redis_host
+    os.environ["REDIS_PORT"] = str(args.redis_port)
+    os.environ["PROBE_LOG_DIR"] = ""
+    os.environ["ISSUE_SPOOL_PATH"] = ""
+
+    monitor = load_service("monitor_service")
+    from probe_log import ProbeReplayer, read_probe_log, split_cycles
+
+    alert = load_service("alert_service")
+    logging.getLogger().setLevel(logging.ERROR)
+
+    if args.flush:
+        monitor.redis_client.flushdb()
+    elif monitor.redis_client.dbsize():
+        sys.exit("The Redis database is not empty; use a scratch one or --flush.")
+
+    virtual_clock = VirtualClock()
+    clock.use(virtual_clock)
+    replayer = ProbeReplayer()
+    monitor.send_get_request = replayer.get
+    monitor.send_post_request = replayer.post
+
+    notifications = []
+
+    def collect_alert(message: str, route: str, *args) -> list:
+        notifications.append((clock.now(), f"[{route}] {message}"))
+        return ["replay"]
+
+    alert.send_alerts = collect_alert
+
+    head_payload = {
+        "jsonrpc": "2.0",
+        "method": "eth_getBlockByNumber",
+        "params": ["latest", False],
+        "id": 1,
+    }
+    states = {}
+    cycles = 0
+    for cycle, requests in split_cycles(read_probe_log(args.logs)):
+        virtual_clock.set(cycle["t"])
+        replayer.load(requests)
+        head_polls = max(
+            replayer.pending("post", url, head_payload)
+            for url in monitor.config.IDCHAIN_RPC_URLS
+        )
+        for _ in range(head_polls):
+            monitor.chain_head_tracker.poll()
+        try:
+            monitor.run_cycle(states, cycle["counter"])
+            alert.process_issue_groups()
+        except Exception as e:
+            logging.error(f"Cycle at {format_timestamp(cycle['t'])} failed: {e}")
+        cycles += 1
+
+    for timestamp, message in notifications:
+        summary = " | ".join(message.splitlines()[:2])
+        print(f"{format_timestamp(timestamp)}  {summary}")
+    print(
+        f"\nReplayed {cycles} cycles, {len(notifications)} notifications, "
+        f"{replayer.missing} requests without a recorded result."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Simulate synthetic issue load through the alert grouping on a virtual clock.
+
+Generates issues across many node groups, opens and resolves them on a
+virtual clock, and runs an alert pass every alert service cycle. Reports the
+CPU time of the passes and the notifications they produced, so the cost of
+the grouping logic can be measured in seconds instead of waiting for
+GROUP_WAIT, GROUP_INTERVAL and REPEAT_INTERVAL in real time. Issues and alert
+groups are written to the given Redis, which must be a scratch instance.
+
+    set -a; . ./config.env; set +a
+    python tools/simulate.py --redis-port 6380 --groups 2000 --hours 24
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import random
+import sys
+import time
+
+# Importing replay also puts the repository root on the path.
+from replay import load_service
+
+from shared import clock
+from shared.clock import VirtualClock
+from shared.issue_store import IssueStore
+from shared.issue_templates import render_issue_message
+
+# Node issue types whose messages only need the node url.
+ISSUE_TYPES = (
+    "node_state",
+    "receiver",
+    "scorer",
+    "apps_updater",
+    "sponsorships_updater",
+    "seed_groups_updater",
+)
+START = 1_700_000_000
+
+
+def generate_events(
+    rng: random.Random, groups: int, episodes: int, duration: int, mean_outage: int
+) -> list[tuple[float, bool, str, str, str]]:
+    """Return (time, opened, issue id, node url, issue type) events, in order."""
+    events = []
+    for group in range(groups):
+        node_url = f"https://node{group}.example/brightid/v6/state"
+        for _ in range(episodes):
+            issue_type = rng.choice(ISSUE_TYPES)
+            issue_id = f"sim:{group}:{issue_type}"
+            opened_at = START + rng.uniform(0, duration)
+            resolved_at = opened_at + rng.expovariate(1 / mean_outage)
+            events.append((opened_at, True, issue_id, node_url, issue_type))
+            events.append((resolved_at, False, issue_id, node_url, issue_type))
+    events.sort()
+    return events
+
+
+def apply_event(
+    issue_store: IssueStore, opened: bool, issue_id: str, node_url: str, issue_type: str
+) -> None:
+    fields = {"node": node_url}
+    if opened:
+        issue_store.insert_new_issue(
+            issue_id,
+            render_issue_message(issue_type, fields),
+            hashlib.sha256(node_url.encode("utf-8")).hexdigest(),
+            "node",
+            node_url,
+            issue_type,
+            "critical" if issue_type == "node_state" else "warning",
+            fields,
+        )
+    elif issue_store.issue_exists(issue_id):
+        issue_store.mark_issue_resolved(
+            issue_id, render_issue_message(issue_type, fields, resolved=True), 3600
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--redis-host", default="localhost")
+    parser.add_argument("--redis-port", type=int, required=True)
+    parser.add_argument(
+        "--flush",
+        action="store_true",
+        help="empty the Redis database before simulating",
+    )
+    parser.add_argument("--groups", type=int, default=1000)
+    parser.add_argument(
+        "--episodes", type=int, default=3, help="outages per group over the run"
+    )
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument(
+        "--mean-outage", type=int, default=1800, help="mean outage in seconds"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["REDIS_HOST"] = args.redis_host
+    os.environ["REDIS_PORT"] = str(args.redis_port)
+
+    alert = load_service("alert_service")
+    logging.getLogger().setLevel(logging.ERROR)
+
+    if args.flush:
+        alert.redis_client.flushdb()
+    elif alert.redis_client.dbsize():
+        sys.exit("The Redis database is not empty; use a scratch one or --flush.")
+
+    virtual_clock = VirtualClock(START)
+    clock.use(virtual_clock)
+    issue_store = IssueStore(alert.redis_client)
+
+    notifications = 0
+
+    def count_alert(message: str, route: str, *args) -> list:
+        nonlocal notifications
+        notifications += 1
+        return ["simulation"]
+
+    alert.send_alerts = count_alert
+
+    duration = int(args.hours * 3600)
+    events = generate_events(
+        random.Random(args.seed), args.groups, args.episodes, duration, args.mean_outage
+    )
+    step = alert.config.CHECK_INTERVAL * 2
+    pass_times = []
+    position = 0
+    while virtual_clock.time() <= START + duration:
+        while position < len(events) and events[position][0] <= virtual_clock.time():
+            apply_event(issue_store, *events[position][1:])
+            position += 1
+
+        started = time.process_time()
+        alert.process_issue_groups()
+        pass_times.append(time.process_time() - started)
+        virtual_clock.sleep(step)
+
+    pass_times.sort()
+    print(
+        f"Simulated {args.hours:g} hours: {args.groups} groups, "
+        f"{len(events) // 2} outages, {len(pass_times)} alert passes."
+    )
+    print(f"Notifications: {notifications}")
+    print(
+        f"Alert pass CPU time: total {sum(pass_times):.2f}s, "
+        f"mean {1000 * sum(pass_times) / len(pass_times):.2f}ms, "
+        f"p95 {1000 * pass_times[int(0.95 * (len(pass_times) - 1))]:.2f}ms, "
+        f"max {1000 * pass_times[-1]:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
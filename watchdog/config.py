@@ -3,5 +3,22 @@ import os
 REDIS_HOST = os.environ["REDIS_HOST"]
 REDIS_PORT = int(os.environ["REDIS_PORT"])
 CHECK_INTERVAL = int(os.environ["CHECK_INTERVAL"])
+WATCHDOG_TICK = int(os.environ["WATCHDOG_TICK"])
 WATCHDOG_THRESHOLD = int(os.environ["WATCHDOG_THRESHOLD"])
+WATCHDOG_MISSED_HEARTBEATS = int(os.environ["WATCHDOG_MISSED_HEARTBEATS"])
+WATCHDOG_MAX_CONSECUTIVE_ERRORS = int(os.environ["WATCHDOG_MAX_CONSECUTIVE_ERRORS"])
+# Services write their heartbeat at every stage of a cycle, so the longest
+# regular gap between two heartbeats is the alert service's sleep between
+# cycles.
+HEARTBEAT_INTERVAL = 2 * CHECK_INTERVAL
+MISSED_HEARTBEAT_THRESHOLD = WATCHDOG_MISSED_HEARTBEATS * HEARTBEAT_INTERVAL
 COMPOSE_PROJECT_NAME = os.environ["COMPOSE_PROJECT_NAME"]
+RESTART_BACKOFF_BASE = int(os.environ["RESTART_BACKOFF_BASE"])
+RESTART_BACKOFF_MAX = int(os.environ["RESTART_BACKOFF_MAX"])
+CRASH_LOOP_WINDOW = int(os.environ["CRASH_LOOP_WINDOW"])
+CRASH_LOOP_RESTARTS = int(os.environ["CRASH_LOOP_RESTARTS"])
+TELEGRAM_BOT_KEY = os.environ["TELEGRAM_BOT_KEY"]
+TELEGRAM_BOT_CHANNEL = os.environ["TELEGRAM_BOT_CHANNEL"]
+HTTP_CONNECT_TIMEOUT = int(os.environ["HTTP_CONNECT_TIMEOUT"])
+HTTP_READ_TIMEOUT = int(os.environ["HTTP_READ_TIMEOUT"])
+HTTP_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
@@ -1,9 +1,14 @@
 import logging
 import time
+import uuid
+from collections import deque
+from threading import Thread
+from typing import Optional
 
 import config
 import docker
 import redis
+import requests
 
 # Configure logging
 logging.basicConfig(
@@ -12,62 +17,455 @@ logging.basicConfig(
 
 # Initialize Redis
 redis_client = redis.Redis(
-    host=config.REDIS_HOST, port=config.REDIS_PORT, decode_responses=True
+    host=config.REDIS_HOST,
+    port=config.REDIS_PORT,
+    decode_responses=True,
+    socket_connect_timeout=config.WATCHDOG_TICK,
 )
 
 SERVICES = ["monitor_service", "alert_service"]
+PROJECT_LABEL = "com.docker.compose.project"
+SERVICE_LABEL = "com.docker.compose.service"
+HEARTBEAT_PATTERN = "__keyspace@*__:health:*"
+HEARTBEAT_INT_FIELDS = (
+    "cycle",
+    "cycle_started_at",
+    "last_completed_at",
+    "backlog",
+    "errors",
+    "consecutive_errors",
+    "updated_at",
+)
 docker_client = docker.from_env()
 watchdog_start_time = int(time.time())
 
+# Filled from Redis keyspace notifications and Docker events, so the health
+# check loop itself never has to query Redis or Docker.
+last_heartbeats: dict[str, int] = {}
+heartbeats: dict[str, dict] = {}
+slow_services: set[str] = set()
+containers: dict = {}
+# Services that are held back by the restart backoff, with the time at which
+# the next restart is allowed.
+delayed_restarts: dict[str, int] = {}
+# Services in a crash loop, with the time the loop was detected.
+crash_loops: dict[str, int] = {}
+# Services restarted by the watchdog whose container has not started again yet;
+# their die events are part of the restart, not a crash.
+restarting_services: set[str] = set()
+# Restart history members recorded by this process, so backoff and crash loop
+# detection keep working while Redis is unreachable.
+restart_history: dict[str, deque] = {}
+# Time Redis became unreachable, and whether that was alerted, while it is down.
+redis_down_since: Optional[int] = None
+redis_down_alerted = False
 
-def get_last_check(service_name: str) -> int:
-    """Retrieve last check timestamp from Redis."""
-    timestamp = redis_client.get(f"health:{service_name}")
-    return int(timestamp) if timestamp else 0
 
+def get_heartbeat(service_name: str) -> dict:
+    """Retrieve the heartbeat hash of a service from Redis."""
+    heartbeat = redis_client.hgetall(f"health:{service_name}")
+    for field in HEARTBEAT_INT_FIELDS:
+        if field in heartbeat:
+            heartbeat[field] = int(heartbeat[field])
+    return heartbeat
 
-def get_service_container(service_name: str):
-    """Find a Docker Compose service container by labels."""
-    containers = docker_client.containers.list(
+
+def load_heartbeat(service_name: str) -> None:
+    """Refresh the cached heartbeat of a service."""
+    try:
+        heartbeat = get_heartbeat(service_name)
+    except redis.exceptions.ResponseError:
+        # Heartbeat still written as a plain timestamp by an older version.
+        heartbeat = {"updated_at": int(redis_client.get(f"health:{service_name}"))}
+    if not heartbeat:
+        return
+
+    heartbeats[service_name] = heartbeat
+    last_heartbeats[service_name] = max(
+        last_heartbeats.get(service_name, 0), heartbeat.get("updated_at", 0)
+    )
+
+
+def load_last_checks() -> None:
+    """Seed the heartbeat cache from Redis."""
+    for service in SERVICES:
+        load_heartbeat(service)
+
+
+def enable_keyspace_notifications() -> None:
+    """Make sure Redis publishes keyspace events for hash writes."""
+    try:
+        flags = redis_client.config_get("notify-keyspace-events").get(
+            "notify-keyspace-events", ""
+        )
+        missing = "".join(flag for flag in "Kh" if flag not in flags)
+        if missing:
+            redis_client.config_set("notify-keyspace-events", flags + missing)
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"Could not enable Redis keyspace notifications: {e}")
+
+
+def watch_heartbeats() -> None:
+    """Record service heartbeats as soon as they are written to Redis."""
+    while True:
+        try:
+            enable_keyspace_notifications()
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(HEARTBEAT_PATTERN)
+            # Heartbeats written while we were not subscribed are picked up here.
+            load_last_checks()
+            for message in pubsub.listen():
+                service = message["channel"].split("health:", 1)[1]
+                if service in SERVICES:
+                    last_heartbeats[service] = int(time.time())
+                    load_heartbeat(service)
+        except Exception as e:
+            logging.error(f"Heartbeat subscription failed: {e}")
+        time.sleep(config.WATCHDOG_TICK)
+
+
+def container_service(container) -> Optional[str]:
+    return container.labels.get(SERVICE_LABEL)
+
+
+def load_containers() -> None:
+    """Cache the project service containers by their compose service label."""
+    for container in docker_client.containers.list(
         all=True,
-        filters={
-            "label": [
-                f"com.docker.compose.project={config.COMPOSE_PROJECT_NAME}",
-                f"com.docker.compose.service={service_name}",
-            ]
-        },
+        filters={"label": [f"{PROJECT_LABEL}={config.COMPOSE_PROJECT_NAME}"]},
+    ):
+        service = container_service(container)
+        if service in SERVICES:
+            containers[service] = container
+
+
+def get_service_container(service_name: str):
+    """Return the cached container of a Docker Compose service."""
+    container = containers.get(service_name)
+    if container is None:
+        load_containers()
+        container = containers.get(service_name)
+    return container
+
+
+def handle_docker_event(event: dict) -> None:
+    """Keep the container cache current and react to dead containers."""
+    attributes = event.get("Actor", {}).get("Attributes", {})
+    service = attributes.get(SERVICE_LABEL)
+    if service not in SERVICES:
+        return
+
+    action = event.get("Action")
+    if action == "start":
+        restarting_services.discard(service)
+        containers[service] = docker_client.containers.get(event["id"])
+        # A fresh container gets a full threshold to report its first heartbeat,
+        # and the error count of the previous one no longer applies.
+        last_heartbeats[service] = int(time.time())
+        heartbeats.pop(service, None)
+    elif action == "destroy":
+        container = containers.get(service)
+        if container is not None and container.id == event["id"]:
+            del containers[service]
+    elif action == "die":
+        logging.warning(
+            f"{service} container died with exit code {attributes.get('exitCode')}."
+        )
+        if service in restarting_services:
+            return
+        record_restart(service, "die")
+        check_crash_loop(service, get_recent_restarts(service))
+        container = get_service_container(service)
+        if container is None:
+            return
+        container.reload()
+        restart_policy = container.attrs["HostConfig"]["RestartPolicy"]["Name"]
+        if restart_policy in ("", "no"):
+            restart_service(service)
+
+
+def watch_docker_events() -> None:
+    """Follow the Docker events stream of the compose project."""
+    while True:
+        try:
+            load_containers()
+            for event in docker_client.events(
+                decode=True,
+                filters={
+                    "type": "container",
+                    "label": f"{PROJECT_LABEL}={config.COMPOSE_PROJECT_NAME}",
+                },
+            ):
+                handle_docker_event(event)
+        except Exception as e:
+            logging.error(f"Docker events stream failed: {e}")
+        time.sleep(config.WATCHDOG_TICK)
+
+
+def restarts_key(service_name: str) -> str:
+    return f"watchdog:restarts:{service_name}"
+
+
+def crash_loop_key(service_name: str) -> str:
+    return f"watchdog:crash_loop:{service_name}"
+
+
+def record_restart(service_name: str, kind: str) -> None:
+    """Remember a watchdog restart or a container death in memory and Redis."""
+    now = int(time.time())
+    # The random suffix keeps events of the same kind within a second apart.
+    member = f"{now}:{kind}:{uuid.uuid4().hex[:8]}"
+    restart_history.setdefault(service_name, deque()).append(member)
+    key = restarts_key(service_name)
+    try:
+        pipe = redis_client.pipeline()
+        pipe.zadd(key, {member: now})
+        pipe.zremrangebyscore(key, 0, now - config.CRASH_LOOP_WINDOW)
+        pipe.expire(key, config.CRASH_LOOP_WINDOW)
+        pipe.execute()
+    except redis.exceptions.RedisError as e:
+        logging.error(f"Failed to record {kind} of {service_name}: {e}")
+
+
+def get_recent_restarts(service_name: str) -> list[tuple[int, str]]:
+    """Return (timestamp, kind) of restarts and deaths within the crash window.
+
+    The history in Redis also covers earlier watchdog processes; when it
+    cannot be read, the history of this process is used alone.
+    """
+    now = int(time.time())
+    history = restart_history.setdefault(service_name, deque())
+    while history and int(history[0].split(":", 1)[0]) < now - config.CRASH_LOOP_WINDOW:
+        history.popleft()
+    members = set(history)
+    try:
+        members.update(
+            redis_client.zrangebyscore(
+                restarts_key(service_name), now - config.CRASH_LOOP_WINDOW, now
+            )
+        )
+    except redis.exceptions.RedisError as e:
+        logging.error(f"Failed to read restart history of {service_name}: {e}")
+
+    restarts = []
+    for member in members:
+        timestamp, kind = member.split(":")[:2]
+        restarts.append((int(timestamp), kind))
+    return sorted(restarts)
+
+
+def next_restart_allowed(restarts: list[tuple[int, str]]) -> int:
+    """Apply exponential backoff to the watchdog restarts within the window."""
+    restart_times = [timestamp for timestamp, kind in restarts if kind == "restart"]
+    if not restart_times:
+        return 0
+
+    delay = min(
+        config.RESTART_BACKOFF_BASE * 2 ** (len(restart_times) - 1),
+        config.RESTART_BACKOFF_MAX,
+    )
+    return max(restart_times) + delay
+
+
+def send_watchdog_alert(message: str) -> None:
+    """Send an alert straight to Telegram, without the alert service."""
+    try:
+        response = requests.post(
+            f"https://api.telegram.org/bot{config.TELEGRAM_BOT_KEY}/sendMessage",
+            json={"chat_id": config.TELEGRAM_BOT_CHANNEL, "text": message},
+            timeout=config.HTTP_TIMEOUT,
+        )
+        response.raise_for_status()
+    except Exception as e:
+        logging.error(f"Telegram error: {e}")
+
+
+def check_crash_loop(service_name: str, restarts: list[tuple[int, str]]) -> None:
+    """Alert once when a service keeps getting restarted without recovering."""
+    if service_name in crash_loops or len(restarts) < config.CRASH_LOOP_RESTARTS:
+        return
+
+    now = int(time.time())
+    crash_loops[service_name] = now
+    try:
+        if not redis_client.set(
+            crash_loop_key(service_name), now, nx=True, ex=config.CRASH_LOOP_WINDOW
+        ):
+            # Already reported before the watchdog itself was restarted.
+            return
+    except redis.exceptions.RedisError as e:
+        logging.error(f"Failed to store crash loop state of {service_name}: {e}")
+
+    logging.error(
+        f"{service_name} is crash looping: {len(restarts)} restarts in "
+        f"{config.CRASH_LOOP_WINDOW} seconds."
+    )
+    send_watchdog_alert(
+        f"⚠️ BrightID alert {service_name} cannot be recovered.\n"
+        f"Restarts: {len(restarts)} in the last "
+        f"{config.CRASH_LOOP_WINDOW // 60} minutes"
     )
-    return containers[0] if containers else None
 
 
-def restart_service(service_name: str) -> None:
-    """Restart the given service."""
+def check_crash_loop_recovery(service_name: str) -> None:
+    """Clear the crash loop state once the service completes a cycle again."""
+    detected_at = crash_loops.get(service_name)
+    if detected_at is None:
+        return
+
+    last_completed_at = heartbeats.get(service_name, {}).get("last_completed_at", 0)
+    if last_completed_at <= detected_at:
+        return
+
+    del crash_loops[service_name]
+    try:
+        redis_client.delete(crash_loop_key(service_name))
+    except redis.exceptions.RedisError as e:
+        logging.error(f"Failed to clear crash loop state of {service_name}: {e}")
+    logging.info(f"{service_name} recovered from its crash loop.")
+    send_watchdog_alert(f"✅ BrightID alert {service_name} recovered.")
+
+
+def load_crash_loops() -> None:
+    """Restore crash loops detected before the watchdog was restarted."""
+    for service in SERVICES:
+        try:
+            detected_at = redis_client.get(crash_loop_key(service))
+        except redis.exceptions.RedisError as e:
+            logging.error(f"Failed to load crash loop state of {service}: {e}")
+            continue
+        if detected_at:
+            crash_loops[service] = int(detected_at)
+
+
+def restart_service(service_name: str, reason: str = "unresponsive") -> None:
+    """Restart the given service, backing off when it keeps failing."""
+    now = int(time.time())
+    restarts = get_recent_restarts(service_name)
+    allowed_at = next_restart_allowed(restarts)
+    if now < allowed_at:
+        if delayed_restarts.get(service_name) != allowed_at:
+            delayed_restarts[service_name] = allowed_at
+            logging.warning(
+                f"{service_name} is {reason}, next restart allowed in "
+                f"{allowed_at - now} seconds."
+            )
+        return
+
+    delayed_restarts.pop(service_name, None)
     try:
         container = get_service_container(service_name)
         if container is None:
             logging.error(f"Could not find container for {service_name}.")
             return
 
-        logging.warning(f"{service_name} is unresponsive! Restarting...")
+        logging.warning(f"{service_name} is {reason}! Restarting...")
+        restarting_services.add(service_name)
         container.restart()
+        last_heartbeats[service_name] = int(time.time())
         logging.info(f"{service_name} restarted successfully.")
     except Exception as e:
+        # No die and start events will follow to clear the flag.
+        restarting_services.discard(service_name)
         logging.error(f"Failed to restart {service_name}: {e}")
 
+    record_restart(service_name, "restart")
+    check_crash_loop(service_name, restarts + [(now, "restart")])
+
+
+def check_progress(service_name: str, current_time: int) -> None:
+    """Warn about a service that is alive but has not completed a cycle lately.
+
+    Such a service is still reporting progress, so it is slow rather than hung
+    and restarting it would only throw away the work in flight.
+    """
+    heartbeat = heartbeats.get(service_name, {})
+    last_completed_at = heartbeat.get("last_completed_at", current_time)
+    if current_time - last_completed_at <= config.WATCHDOG_THRESHOLD:
+        slow_services.discard(service_name)
+        return
+
+    if service_name not in slow_services:
+        slow_services.add(service_name)
+        logging.warning(
+            f"{service_name} is slow: no completed cycle for "
+            f"{current_time - last_completed_at} seconds, currently in stage "
+            f"'{heartbeat.get('stage')}' with backlog {heartbeat.get('backlog')}, "
+            f"last completed stage '{heartbeat.get('completed_stage')}'."
+        )
+
+
+def check_redis(current_time: int) -> bool:
+    """Tell whether Redis is reachable; alert when it stays unreachable."""
+    global redis_down_since, redis_down_alerted
+    try:
+        redis_client.ping()
+    except redis.exceptions.RedisError as e:
+        if redis_down_since is None:
+            redis_down_since = current_time
+            logging.error(f"Redis is unreachable, heartbeat checks paused: {e}")
+        down_for = current_time - redis_down_since
+        if not redis_down_alerted and down_for > config.MISSED_HEARTBEAT_THRESHOLD:
+            redis_down_alerted = True
+            send_watchdog_alert(
+                f"⚠️ BrightID alert Redis is unreachable.\n"
+                f"Down for: {down_for // 60} minutes"
+            )
+        return False
+
+    if redis_down_since is not None:
+        logging.info(
+            f"Redis is reachable again after {current_time - redis_down_since} "
+            "seconds."
+        )
+        if redis_down_alerted:
+            send_watchdog_alert("✅ BrightID alert Redis recovered.")
+        # Silence while Redis was down does not count as missed heartbeats.
+        for service in SERVICES:
+            if service in last_heartbeats:
+                last_heartbeats[service] += current_time - redis_down_since
+        redis_down_since = None
+        redis_down_alerted = False
+    return True
+
 
 def watchdog():
     """Main loop checking service health."""
+    load_crash_loops()
+    Thread(target=watch_heartbeats, daemon=True).start()
+    Thread(target=watch_docker_events, daemon=True).start()
     while True:
         current_time = int(time.time())
+        if not check_redis(current_time):
+            # Services write their heartbeats to Redis, so while it is down
+            # their silence says nothing about them.
+            time.sleep(config.WATCHDOG_TICK)
+            continue
+
         for service in SERVICES:
             # Skip check if we are still in the startup grace period
-            if current_time - watchdog_start_time < config.WATCHDOG_THRESHOLD:
+            if current_time - watchdog_start_time < config.MISSED_HEARTBEAT_THRESHOLD:
                 continue
 
-            last_check = get_last_check(service)
-            if current_time - last_check > config.WATCHDOG_THRESHOLD:
+            # A hung service stops writing heartbeats within a stage or two,
+            # while a slow one keeps writing them and is only reported by
+            # check_progress.
+            last_check = last_heartbeats.get(service, 0)
+            consecutive_errors = heartbeats.get(service, {}).get(
+                "consecutive_errors", 0
+            )
+            if current_time - last_check > config.MISSED_HEARTBEAT_THRESHOLD:
                 restart_service(service)
-        time.sleep(config.CHECK_INTERVAL * 3)
+            elif consecutive_errors >= config.WATCHDOG_MAX_CONSECUTIVE_ERRORS:
+                # Failing cycles still write heartbeats, so the service looks
+                # alive although it does no work.
+                restart_service(
+                    service, f"failing ({consecutive_errors} cycles in a row)"
+                )
+            else:
+                check_progress(service, current_time)
+            check_crash_loop_recovery(service)
+        time.sleep(config.WATCHDOG_TICK)
 
 
 if __name__ == "__main__":